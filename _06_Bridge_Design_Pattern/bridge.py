@@ -31,15 +31,95 @@ implementation.
 
 doc src. : https://www.geeksforgeeks.org/bridge-design-pattern/
 
+The same idea is applied one level further down with the EmployeeStore
+implementors. StoredEmployeeInfo (abstraction) answers get_info() by looking
+the employee up by name in whichever store it was handed, so the workforce
+can live in a dict, a sqlite file or a memory-mapped record file without the
+client code changing.
+
+SalaryRollup keeps per-department (or per-role) salary totals up to date as
+employees and salaries are added, reassigned or removed. The department,
+role, employee and salary attributes are ObservedAttribute descriptors that
+notify the watchers of an object when reassigned, so a plain
+`eng_emp.department = "QA"` is enough to move the salary across groups.
+
 """
 
 import abc
+import heapq
+import mmap
+import os
+import sqlite3
+import struct
+import tempfile
+import time
+from collections import Counter, namedtuple
+
+
+class ObservedAttribute:
+    """
+    Data descriptor telling the watchers of an object whenever the attribute
+    is reassigned.
+
+    Watchers are registered with watch(obj, watcher) and implement
+    attribute_changed(obj, name, old, new). They may also implement
+    attribute_changing(obj, name, old, new), called before the value is
+    stored, to veto the assignment by raising. The classes only declare which
+    attributes can be watched; the watcher list is a separate object kept
+    in the instance dict. Objects with no watcher pay a single dict lookup
+    per assignment of an observed attribute, other attributes nothing.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the descriptor, named by __set_name__()."""
+        self.name = None
+
+    def __set_name__(self, owner, name) -> None:
+        """Remember the attribute name the descriptor is bound to."""
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        """Return the value of the attribute."""
+        if obj is None:
+            return self
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+
+    def __set__(self, obj, value) -> None:
+        """Let the watchers veto the change, set the attribute, notify them."""
+        state = obj.__dict__
+        watchers = state.get('_watchers')
+        if not watchers or self.name not in state:
+            state[self.name] = value
+            return
+        old = state[self.name]
+        for watcher in list(watchers):
+            changing = getattr(watcher, 'attribute_changing', None)
+            if changing is not None:
+                changing(obj, self.name, old, value)
+        state[self.name] = value
+        for watcher in list(watchers):
+            watcher.attribute_changed(obj, self.name, old, value)
+
+
+def watch(obj, watcher) -> None:
+    """Register a watcher of the observed attributes of obj."""
+    obj.__dict__.setdefault('_watchers', []).append(watcher)
+
+
+def unwatch(obj, watcher) -> None:
+    """Unregister a watcher previously registered with watch()."""
+    obj.__dict__.get('_watchers', []).remove(watcher)
 
 
 # pylint: disable=too-few-public-methods
 class Employee(abc.ABC):
     """Abstract base class for an employee."""
 
+    department = ObservedAttribute()
+
     def __init__(self, name, department) -> None:
         """Initialize the Employee object."""
         self.name = name
@@ -54,6 +134,8 @@ class Employee(abc.ABC):
 class Engineer(Employee):
     """Concrete class representing an engineer."""
 
+    role = ObservedAttribute()
+
     def __init__(self, name, department, role) -> None:
         """Initialize the Engineer object."""
         super().__init__(name, department)
@@ -68,6 +150,8 @@ class Engineer(Employee):
 class Support(Employee):
     """Concrete class representing a support employee."""
 
+    role = ObservedAttribute()
+
     def __init__(self, name, department, role) -> None:
         """Initialize the Support object."""
         super().__init__(name, department)
@@ -82,6 +166,8 @@ class Support(Employee):
 class EmployeeInfo(abc.ABC):
     """Abstract base class for obtaining employee information."""
 
+    employee = ObservedAttribute()
+
     def __init__(self, employee) -> None:
         """Initialize the EmployeeInfo object."""
         self.employee = employee
@@ -97,6 +183,8 @@ class EmployeeInfo(abc.ABC):
 class SalaryInfo(EmployeeInfo):
     """Concrete class for obtaining salary information."""
 
+    salary = ObservedAttribute()
+
     def __init__(self, employee, salary) -> None:
         """Initialize the SalaryInfo object."""
         super().__init__(employee)
@@ -116,6 +204,511 @@ class RoleInfo(EmployeeInfo):
         return f'{self.employee.name} has a role {self.employee.role}'
 
 
+EmployeeRecord = namedtuple('EmployeeRecord', 'name department role salary')
+
+
+class EmployeeStore(abc.ABC):
+    """
+    Implementor side of the bridge : where the employee records live.
+
+    Every store hands back EmployeeRecord tuples, which carry the same
+    name / department / role attributes as Employee, so the existing
+    SalaryInfo and RoleInfo classes can format them unchanged.
+    """
+
+    @abc.abstractmethod
+    def add(self, employee, salary=0) -> None:
+        """
+        Store (or overwrite) the record for the given employee.
+
+        Args:
+            employee (Employee): Employee to store, must have a role.
+            salary (int): Salary of the employee.
+        """
+
+    @abc.abstractmethod
+    def get(self, name) -> EmployeeRecord:
+        """
+        Look up one employee by name.
+
+        Args:
+            name (str): Name of the employee.
+
+        Returns:
+            EmployeeRecord: The stored record.
+
+        Raises:
+            KeyError: If no employee with that name is stored.
+        """
+
+    @abc.abstractmethod
+    def by_department(self, department) -> list:
+        """
+        Return every record of the given department.
+
+        Args:
+            department (str): Department to filter on.
+
+        Returns:
+            list: List of EmployeeRecord.
+        """
+
+    @abc.abstractmethod
+    def __len__(self) -> int:
+        """Return the number of stored employees."""
+
+    def add_many(self, rows) -> None:
+        """
+        Store several (employee, salary) pairs at once.
+
+        Args:
+            rows (iterable): Iterable of (employee, salary) tuples.
+        """
+        for employee, salary in rows:
+            self.add(employee, salary)
+
+    def close(self) -> None:
+        """Release any resource held by the store."""
+
+
+class InMemoryEmployeeStore(EmployeeStore):
+    """Concrete implementor keeping the records in a plain dict."""
+
+    def __init__(self) -> None:
+        """Initialize the empty store."""
+        self._records = {}
+
+    def add(self, employee, salary=0) -> None:
+        """Store the record for the given employee."""
+        self._records[employee.name] = EmployeeRecord(
+            employee.name, employee.department, employee.role, salary)
+
+    def get(self, name) -> EmployeeRecord:
+        """Look up one employee by name."""
+        return self._records[name]
+
+    def by_department(self, department) -> list:
+        """Return every record of the given department."""
+        return [rec for rec in self._records.values()
+                if rec.department == department]
+
+    def __len__(self) -> int:
+        """Return the number of stored employees."""
+        return len(self._records)
+
+
+class SqliteEmployeeStore(EmployeeStore):
+    """
+    Concrete implementor backed by a local sqlite database.
+
+    The name is the primary key (and hence indexed) and a secondary index
+    is kept on department, so both lookups avoid a table scan.
+    """
+
+    def __init__(self, path=':memory:') -> None:
+        """
+        Open (or create) the database.
+
+        Args:
+            path (str): Path of the sqlite file, in memory by default.
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS employees ('
+            'name TEXT PRIMARY KEY, department TEXT, role TEXT, '
+            'salary INTEGER)')
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_employees_department '
+            'ON employees (department)')
+        self._conn.commit()
+
+    def add(self, employee, salary=0) -> None:
+        """Store the record for the given employee."""
+        self.add_many([(employee, salary)])
+
+    def add_many(self, rows) -> None:
+        """Store several (employee, salary) pairs in one transaction."""
+        with self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO employees VALUES (?, ?, ?, ?)',
+                ((emp.name, emp.department, emp.role, salary)
+                 for emp, salary in rows))
+
+    def get(self, name) -> EmployeeRecord:
+        """Look up one employee by name."""
+        row = self._conn.execute(
+            'SELECT name, department, role, salary FROM employees '
+            'WHERE name = ?', (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return EmployeeRecord(*row)
+
+    def by_department(self, department) -> list:
+        """Return every record of the given department."""
+        rows = self._conn.execute(
+            'SELECT name, department, role, salary FROM employees '
+            'WHERE department = ?', (department,))
+        return [EmployeeRecord(*row) for row in rows]
+
+    def __len__(self) -> int:
+        """Return the number of stored employees."""
+        return self._conn.execute('SELECT COUNT(*) FROM employees').fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+
+class MmapEmployeeStore(EmployeeStore):
+    """
+    Concrete implementor backed by a file of fixed-width records.
+
+    Each record is packed with RECORD (name, department, role, salary) and
+    the file is read through mmap, so a lookup is a dict hit for the offset
+    followed by a single struct unpack. Only the name -> slot index lives in
+    memory, and it is rebuilt by scanning the file once when it is opened.
+    """
+
+    RECORD = struct.Struct('<32s16s32sq')
+
+    def __init__(self, path) -> None:
+        """
+        Open (or create) the record file.
+
+        Args:
+            path (str): Path of the record file.
+        """
+        self.path = path
+        if not os.path.exists(path):
+            open(path, 'wb').close()  # pylint: disable=consider-using-with
+        self._file = open(path, 'r+b')  # pylint: disable=consider-using-with
+        self._map = None
+        self._slots = {}
+        self._remap()
+        for slot in range(len(self._map or b'') // self.RECORD.size):
+            name = self._unpack(slot).name
+            self._slots[name] = slot
+
+    def _remap(self) -> None:
+        """Map the current content of the file (nothing if it is empty)."""
+        if self._map is not None:
+            self._map.close()
+        self._file.flush()
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = (mmap.mmap(self._file.fileno(), size,
+                               access=mmap.ACCESS_READ) if size else None)
+
+    def _unpack(self, slot) -> EmployeeRecord:
+        """Decode the record stored in the given slot."""
+        name, department, role, salary = self.RECORD.unpack_from(
+            self._map, slot * self.RECORD.size)
+        return EmployeeRecord(name.rstrip(b'\0').decode(),
+                              department.rstrip(b'\0').decode(),
+                              role.rstrip(b'\0').decode(), salary)
+
+    def _pack(self, employee, salary) -> bytes:
+        """Encode one record, refusing values that do not fit."""
+        fields = [employee.name, employee.department, employee.role]
+        encoded = [value.encode() for value in fields]
+        for value, width in zip(encoded, (32, 16, 32)):
+            if len(value) > width:
+                raise ValueError(f'{value!r} does not fit in {width} bytes')
+        return self.RECORD.pack(*encoded, salary)
+
+    def add(self, employee, salary=0) -> None:
+        """Store the record for the given employee."""
+        self.add_many([(employee, salary)])
+
+    def add_many(self, rows) -> None:
+        """
+        Append (or overwrite in place) several records, then remap once.
+
+        Every record is packed before anything is written, so a row that
+        does not fit leaves the store untouched.
+
+        Raises:
+            ValueError: If a value does not fit in its field.
+        """
+        records = [(employee.name, self._pack(employee, salary))
+                   for employee, salary in rows]
+        try:
+            for name, record in records:
+                slot = self._slots.get(name)
+                if slot is None:
+                    self._file.seek(0, os.SEEK_END)
+                    slot = self._file.tell() // self.RECORD.size
+                    self._slots[name] = slot
+                else:
+                    self._file.seek(slot * self.RECORD.size)
+                self._file.write(record)
+        finally:
+            self._remap()
+
+    def get(self, name) -> EmployeeRecord:
+        """Look up one employee by name."""
+        return self._unpack(self._slots[name])
+
+    def by_department(self, department) -> list:
+        """Return every record of the given department."""
+        records = (self._unpack(slot) for slot in self._slots.values())
+        return [rec for rec in records if rec.department == department]
+
+    def __len__(self) -> int:
+        """Return the number of stored employees."""
+        return len(self._slots)
+
+    def close(self) -> None:
+        """Unmap and close the record file."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+# pylint: disable=too-few-public-methods
+class StoredEmployeeInfo(EmployeeInfo):
+    """
+    Refined abstraction resolving its employee through an EmployeeStore.
+
+    Only the name is kept here, the record is fetched from the store on every
+    get_info() call so the answer always reflects the backend.
+    """
+
+    def __init__(self, name, store, kind='salary') -> None:
+        """
+        Initialize the StoredEmployeeInfo object.
+
+        Args:
+            name (str): Name of the employee to look up.
+            store (EmployeeStore): Store holding the employee.
+            kind (str): Either 'salary' or 'role'.
+        """
+        super().__init__(None)
+        self.name = name
+        self.store = store
+        self.kind = kind
+
+    def get_info(self):
+        """Get the requested information for the stored employee."""
+        record = self.store.get(self.name)
+        if self.kind == 'salary':
+            return SalaryInfo(record, record.salary).get_info()
+        return RoleInfo(record).get_info()
+
+
+GroupSummary = namedtuple('GroupSummary', 'count total minimum maximum')
+
+
+class _GroupStats:
+    """
+    Running count / sum / min / max of the salaries of one group.
+
+    Min and max use heaps with lazy deletion: removed salaries are only
+    dropped from a heap once they surface at its top, or all at once when
+    the heaps hold more stale entries than live ones.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty stats."""
+        self.count = 0
+        self.total = 0
+        self._live = Counter()
+        self._min_heap = []
+        self._max_heap = []
+
+    def add(self, salary) -> None:
+        """Account for one more salary."""
+        self.count += 1
+        self.total += salary
+        self._live[salary] += 1
+        heapq.heappush(self._min_heap, salary)
+        heapq.heappush(self._max_heap, -salary)
+
+    def remove(self, salary) -> None:
+        """Forget one salary previously added."""
+        self.count -= 1
+        self.total -= salary
+        self._live[salary] -= 1
+        if not self._live[salary]:
+            del self._live[salary]
+        if max(len(self._min_heap), len(self._max_heap)) > 2 * self.count:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rebuild both heaps from the live salaries only."""
+        self._min_heap = list(self._live.elements())
+        heapq.heapify(self._min_heap)
+        self._max_heap = [-salary for salary in self._min_heap]
+        heapq.heapify(self._max_heap)
+
+    def summary(self) -> GroupSummary:
+        """Return the current GroupSummary."""
+        while self._min_heap[0] not in self._live:
+            heapq.heappop(self._min_heap)
+        while -self._max_heap[0] not in self._live:
+            heapq.heappop(self._max_heap)
+        return GroupSummary(self.count, self.total,
+                            self._min_heap[0], -self._max_heap[0])
+
+
+class SalaryRollup:
+    """
+    Aggregate index of SalaryInfo objects grouped by an Employee attribute.
+
+    Adding or removing a SalaryInfo, reassigning its salary or employee, and
+    reassigning the grouping attribute of a tracked employee all update the
+    affected groups in place. Queries therefore cost O(groups), never
+    O(employees).
+    """
+
+    def __init__(self, key='department') -> None:
+        """
+        Initialize the empty rollup.
+
+        Args:
+            key (str): Employee attribute to group by.
+        """
+        self.key = key
+        self._groups = {}
+        self._infos = {}
+        self._by_employee = {}
+
+    def _account(self, group, salary, sign) -> None:
+        """Add (sign=1) or remove (sign=-1) a salary from a group."""
+        if sign > 0:
+            self._groups.setdefault(group, _GroupStats()).add(salary)
+            return
+        stats = self._groups[group]
+        stats.remove(salary)
+        if not stats.count:
+            del self._groups[group]
+
+    def _check(self, employee) -> None:
+        """
+        Raise ValueError unless the grouping attribute of the employee is
+        an ObservedAttribute, so that reassigning it can be followed.
+        """
+        if not isinstance(getattr(type(employee), self.key, None),
+                          ObservedAttribute):
+            raise ValueError(f'{type(employee).__name__}.{self.key} '
+                             'is not an observed attribute')
+
+    def _link(self, info) -> None:
+        """Start watching the employee of the given SalaryInfo."""
+        employee = info.employee
+        infos = self._by_employee.setdefault(id(employee), set())
+        if not infos:
+            watch(employee, self)
+        infos.add(id(info))
+        self._account(getattr(employee, self.key), info.salary, 1)
+
+    def _unlink(self, info, employee, salary) -> None:
+        """Stop accounting the given SalaryInfo for that employee."""
+        infos = self._by_employee[id(employee)]
+        infos.discard(id(info))
+        if not infos:
+            del self._by_employee[id(employee)]
+            unwatch(employee, self)
+        self._account(getattr(employee, self.key), salary, -1)
+
+    def add(self, info) -> None:
+        """
+        Start tracking a SalaryInfo.
+
+        Args:
+            info (SalaryInfo): Salary of one employee.
+
+        Raises:
+            ValueError: If the grouping attribute of the employee is not an
+                ObservedAttribute.
+        """
+        if id(info) in self._infos:
+            return
+        self._check(info.employee)
+        self._infos[id(info)] = info
+        watch(info, self)
+        self._link(info)
+
+    def remove(self, info) -> None:
+        """
+        Stop tracking a SalaryInfo.
+
+        Args:
+            info (SalaryInfo): A SalaryInfo previously added.
+
+        Raises:
+            KeyError: If the SalaryInfo is not tracked.
+        """
+        del self._infos[id(info)]
+        unwatch(info, self)
+        self._unlink(info, info.employee, info.salary)
+
+    def attribute_changing(self, obj, name, old, new) -> None:
+        """
+        Watcher callback refusing, before it is stored, an employee whose
+        grouping attribute cannot be followed. See ObservedAttribute.
+        """
+        # pylint: disable=unused-argument
+        if name == 'employee' and id(obj) in self._infos:
+            self._check(new)
+
+    def attribute_changed(self, obj, name, old, new) -> None:
+        """Watcher callback keeping the groups current, see ObservedAttribute."""
+        if id(obj) in self._infos:
+            if name == 'salary':
+                group = getattr(obj.employee, self.key)
+                self._account(group, old, -1)
+                self._account(group, new, 1)
+            elif name == 'employee':
+                self._unlink(obj, old, obj.salary)
+                self._link(obj)
+        if name == self.key and id(obj) in self._by_employee:
+            for info_id in self._by_employee[id(obj)]:
+                salary = self._infos[info_id].salary
+                self._account(old, salary, -1)
+                self._account(new, salary, 1)
+
+    def summary(self, group) -> GroupSummary:
+        """
+        Return the rollup of one group.
+
+        Raises:
+            KeyError: If no tracked employee belongs to the group.
+        """
+        return self._groups[group].summary()
+
+    def rollup(self) -> dict:
+        """Return a mapping of group -> GroupSummary for every group."""
+        return {group: stats.summary() for group, stats in self._groups.items()}
+
+
+def benchmark_stores(stores, count=10000, lookups=10000) -> dict:
+    """
+    Fill every store with the same synthetic workforce and time lookups.
+
+    Args:
+        stores (dict): Mapping of label -> EmployeeStore.
+        count (int): Number of employees to store.
+        lookups (int): Number of get_info() calls to time.
+
+    Returns:
+        dict: Mapping of label -> average lookup latency in microseconds.
+    """
+    rows = [(Engineer(f'emp{i}', f'dept{i % 50}', 'eng'), i)
+            for i in range(count)]
+    results = {}
+    for label, store in stores.items():
+        store.add_many(rows)
+        infos = [StoredEmployeeInfo(f'emp{(i * 7919) % count}', store)
+                 for i in range(lookups)]
+        start = time.perf_counter()
+        for info in infos:
+            info.get_info()
+        results[label] = (time.perf_counter() - start) / lookups * 1e6
+    return results
+
+
 if __name__ == '__main__':
     eng_emp = Engineer("Amitabh", "SWD", "eng")
     it_emp = Support("Charles", "IT_2", "it")
@@ -128,6 +721,27 @@ if __name__ == '__main__':
     print(eng_emp, it_emp, sep='\n')
     print(emp_info.get_info(), emp_info_role.get_info(), sep='\n')
 
+    rollup = SalaryRollup()
+    rollup.add(emp_info)
+    rollup.add(SalaryInfo(it_emp, 500))
+    print(rollup.rollup())
+    eng_emp.department = "IT_2"
+    print(rollup.rollup())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {
+            'memory': InMemoryEmployeeStore(),
+            'sqlite': SqliteEmployeeStore(os.path.join(tmp, 'emp.db')),
+            'mmap': MmapEmployeeStore(os.path.join(tmp, 'emp.dat')),
+        }
+        for store_name, backend in backends.items():
+            backend.add(eng_emp, 1000)
+            print(store_name, StoredEmployeeInfo("Amitabh", backend).get_info())
+        for store_name, micros in benchmark_stores(backends).items():
+            print(f'{store_name:>6} : {micros:.2f} us per lookup')
+        for backend in backends.values():
+            backend.close()
+
 
 OUTPUT = r"""
 Amitabh is from SWD department. Role is eng
@@ -140,4 +754,15 @@ Amitabh is from SWD department. Role is Senior SWD
 Charles is from IT_2 department. Role is it
 Amitabh has a salary of USD1000000000000000000
 Amitabh has a role Senior SWD
+{'SWD': GroupSummary(count=1, total=1000000000000000000, \
+minimum=1000000000000000000, maximum=1000000000000000000), \
+'IT_2': GroupSummary(count=1, total=500, minimum=500, maximum=500)}
+{'IT_2': GroupSummary(count=2, total=1000000000000000500, minimum=500, \
+maximum=1000000000000000000)}
+memory Amitabh has a salary of USD 1000
+sqlite Amitabh has a salary of USD 1000
+mmap Amitabh has a salary of USD 1000
+memory : 0.83 us per lookup
+sqlite : 7.96 us per lookup
+  mmap : 2.02 us per lookup
 """
@@ -0,0 +1,333 @@
+"""
+TREE TOOLS
+==========
+
+Traversals and binary format plumbing shared by the two composites of this
+package, the Employee hierarchy (children in `reportees`) and the Node tree
+(children in `child_node`). Every helper takes the name of the attribute
+holding the children, so both trees walk the same code.
+
+"""
+
+import atexit
+import mmap
+import os
+import sys
+from array import array
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+# Process pools of map_reduce(), by size, kept until the interpreter exits.
+_POOLS = {}
+
+
+def walk(root, children: str, order: str = 'dfs', max_depth=None,
+         predicate=None):
+    """
+    Lazily yield the nodes of the subtree of root, root included.
+
+    Nothing is materialized up front: depth first keeps one iterator per
+    level, breadth first a queue of the nodes still to expand. Stopping the
+    iteration stops the walk.
+
+    Args:
+        root: The node to start from.
+        children (str): Name of the attribute holding the child nodes.
+        order (str): 'dfs' for preorder depth first, 'bfs' for level order.
+        max_depth (int): Deepest level to visit, root being level 0.
+            Unbounded by default.
+        predicate (callable): Only nodes for which it returns True are
+            yielded; the walk still goes through the others.
+
+    Returns:
+        generator: The matching nodes.
+
+    Raises:
+        ValueError: If order is neither 'dfs' nor 'bfs'.
+    """
+    if order not in ('dfs', 'bfs'):
+        raise ValueError(f'Unknown walk order {order!r}')
+    walker = _walk_dfs if order == 'dfs' else _walk_bfs
+    return walker(root, children, max_depth, predicate)
+
+
+def _walk_dfs(root, children, max_depth, predicate):
+    """Preorder generator behind walk()."""
+    if predicate is None or predicate(root):
+        yield root
+    if max_depth == 0:
+        return
+    stack = [iter(getattr(root, children))]
+    while stack:
+        for node in stack[-1]:
+            if predicate is None or predicate(node):
+                yield node
+            nodes = getattr(node, children)
+            if nodes and (max_depth is None or len(stack) < max_depth):
+                stack.append(iter(nodes))
+                break
+        else:
+            stack.pop()
+
+
+def _walk_bfs(root, children, max_depth, predicate):
+    """Level order generator behind walk()."""
+    if predicate is None or predicate(root):
+        yield root
+    queue = deque([(root, 0)])
+    while queue:
+        node, depth = queue.popleft()
+        if depth == max_depth:
+            continue
+        for child in getattr(node, children):
+            if predicate is None or predicate(child):
+                yield child
+            if getattr(child, children):
+                queue.append((child, depth + 1))
+
+
+def le_array(typecode: str, data=b'') -> array:
+    """Build an array from (or for) little endian bytes."""
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def le_bytes(values: array) -> bytes:
+    """Return the little endian bytes of an array."""
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def read_header(header, view, magic: bytes) -> tuple:
+    """
+    Unpack a version 1 file header starting with magic and version.
+
+    Args:
+        header (struct.Struct): Layout of the header.
+        view (memoryview): The encoded tree.
+        magic (bytes): Expected magic.
+
+    Returns:
+        tuple: The header fields after magic and version.
+
+    Raises:
+        ValueError: If the header is truncated or of another format.
+    """
+    if len(view) < header.size:
+        raise ValueError('Truncated tree header')
+    fields = header.unpack_from(view)
+    if fields[0] != magic or fields[1] != 1:
+        raise ValueError(f'Not a {magic.decode()} tree file')
+    return fields[2:]
+
+
+def read_array(view, offset: int, typecode: str, count: int) -> tuple:
+    """
+    Copy count little endian items out of view, starting at offset.
+
+    Returns:
+        tuple: The array and the offset right after it.
+
+    Raises:
+        ValueError: If the view ends before the last item.
+    """
+    end = offset + array(typecode).itemsize * count
+    if end > len(view):
+        raise ValueError('Truncated tree data')
+    with view[offset:end] as part:
+        return le_array(typecode, part), end
+
+
+def read_text(view, offset: int) -> tuple:
+    """
+    Decode a UTF-8 string preceded by its uint32 byte length.
+
+    Returns:
+        tuple: The string and the offset right after it.
+
+    Raises:
+        ValueError: If the view is truncated or the string is not UTF-8.
+    """
+    (size,), offset = read_array(view, offset, 'I', 1)
+    if offset + size > len(view):
+        raise ValueError('Truncated tree data')
+    with view[offset:offset + size] as part:
+        return str(part, 'utf-8'), offset + size
+
+
+def build(entries, children: str):
+    """
+    Link up a tree from its nodes in preorder, without recursion.
+
+    Args:
+        entries (iterable): (node, number of children) pairs in preorder.
+        children (str): Name of the attribute holding the child nodes,
+            each node is appended to the one of its parent.
+
+    Returns:
+        The root node.
+
+    Raises:
+        ValueError: If the entries hold less or more than one whole tree.
+    """
+    root = None
+    stack = []
+    for node, count in entries:
+        if stack:
+            parent = stack[-1]
+            getattr(parent[0], children).append(node)
+            parent[1] -= 1
+            if not parent[1]:
+                stack.pop()
+        elif root is None:
+            root = node
+        else:
+            raise ValueError('Trailing data after the tree')
+        if count:
+            stack.append([node, count])
+    if root is None or stack:
+        raise ValueError('Truncated tree data')
+    return root
+
+
+def save(root, path: str) -> None:
+    """Write root.to_bytes() to a file."""
+    with open(path, 'wb') as file:
+        file.write(root.to_bytes())
+
+
+def load(path: str, from_bytes):
+    """
+    Decode a file with from_bytes() through a single mmap.
+
+    The mmap is only closed once from_bytes() returns or raises, so
+    from_bytes() must release every view it takes on it.
+    """
+    with open(path, 'rb') as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return from_bytes(data)
+
+
+def _preorder(root, children: str) -> tuple:
+    """
+    List the subtree of root in preorder along with the number of children
+    and the subtree size of every node, in a single traversal.
+    """
+    order, counts, sizes = [], [], []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        # An int on the stack marks the end of the subtree at that position.
+        if isinstance(node, int):
+            sizes[node] = len(order) - node
+            continue
+        nodes = getattr(node, children)
+        stack.append(len(order))
+        order.append(node)
+        counts.append(len(nodes))
+        sizes.append(1)
+        stack.extend(reversed(nodes))
+    return order, counts, sizes
+
+
+def _fold(items, counts, fn, combine):
+    """
+    Fold fn over items listed in preorder, each node followed by its
+    children. Children are matched by position, not identity, so nodes
+    built on the fly by their parent reduce fine. A Future stands for a
+    subtree reduced elsewhere.
+    """
+    values = []
+    for item, count in zip(reversed(items), reversed(counts)):
+        if isinstance(item, Future):
+            values.append(item.result())
+            continue
+        value = fn(item)
+        for _ in range(count):
+            value = combine(value, values.pop())
+        values.append(value)
+    return values.pop()
+
+
+def reduce_inline(root, children: str, fn, combine):
+    """Fold fn over the subtree of root in this process, without recursion."""
+    order, counts, _ = _preorder(root, children)
+    return _fold(order, counts, fn, combine)
+
+
+def _pool(workers: int) -> ProcessPoolExecutor:
+    """Return the shared process pool with that many workers."""
+    pool = _POOLS.get(workers)
+    if pool is None:
+        pool = _POOLS[workers] = ProcessPoolExecutor(workers)
+    return pool
+
+
+@atexit.register
+def _shutdown_pools() -> None:
+    """Shut the process pools of map_reduce() down."""
+    while _POOLS:
+        _POOLS.popitem()[1].shutdown()
+
+
+def _reduce_encoded(data: bytes, decode, children: str, fn, combine):
+    """Rebuild a subtree shipped by map_reduce() and reduce it inline."""
+    return reduce_inline(decode(data), children, fn, combine)
+
+
+# pylint: disable=too-many-arguments
+def map_reduce(root, children: str, fn, combine, decode, *, workers=None,
+               threshold=10000):
+    """
+    Compute fn on every node and combine the results up the tree.
+
+    The value of a node is fn(node) combined, left to right, with the
+    values of its children. Subtrees of at most `threshold` nodes (or of a
+    share of the tree sized to keep every worker busy) are shipped to a
+    process pool, kept across calls; the nodes above them are reduced
+    here once the partial results come back. Small trees are reduced
+    inline. The tree is traversed once either way.
+
+    Shipped subtrees travel in their flat to_bytes() encoding and are
+    rebuilt by decode in the worker, so fn sees rebuilt nodes there and
+    the depth of a subtree is not limited by the recursion of pickle.
+    fn, combine and decode must be picklable, i.e. module level functions
+    or static methods.
+
+    Args:
+        root: The node to start from.
+        children (str): Name of the attribute holding the child nodes.
+        fn (callable): Maps a node to a value.
+        combine (callable): Combines two values into one.
+        decode (callable): Rebuilds a node from its to_bytes() encoding.
+        workers (int): Size of the process pool, CPU count by default.
+        threshold (int): Trees up to this size are reduced inline.
+
+    Returns:
+        The combined value of the whole tree.
+    """
+    order, counts, sizes = _preorder(root, children)
+    if len(order) <= threshold or workers == 1:
+        return _fold(order, counts, fn, combine)
+    workers = workers or os.cpu_count()
+    chunk = max(threshold, len(order) // (workers * 4))
+    pool = _pool(workers)
+    items, item_counts = [], []
+    position = 0
+    while position < len(order):
+        if position and sizes[position] <= chunk:
+            items.append(pool.submit(_reduce_encoded,
+                                     order[position].to_bytes(), decode,
+                                     children, fn, combine))
+            item_counts.append(0)
+            position += sizes[position]
+        else:
+            items.append(order[position])
+            item_counts.append(counts[position])
+            position += 1
+    return _fold(items, item_counts, fn, combine)
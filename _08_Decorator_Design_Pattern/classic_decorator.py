@@ -1,7 +1,21 @@
 from dataclasses import dataclass, field
-import random
-import string
+from typing import ClassVar, Optional
+import bisect
+import contextlib
+import functools
+import io
+import os
+import re
+import tempfile
+import threading
 import time
+import weakref
+try:
+    import fcntl
+    msvcrt = None  # pylint: disable=invalid-name
+except ImportError:  # Windows locks a byte of the file instead
+    fcntl = None
+    import msvcrt  # pylint: disable=import-error
 
 def timeit(func):
     def wrapper(*args, **kwargs):
@@ -12,8 +26,392 @@ def timeit(func):
         return ret
     return wrapper
 
+class LatencyHistogram:
+    """
+    HDR style histogram of durations in nanoseconds.
+
+    Values below 32 get one bucket each, above that every power of two is
+    split in 16 linear sub-buckets, so any recorded value is known within
+    about 6% while the whole 64 bit range fits in about a thousand counters.
+    """
+
+    SUB_BUCKETS = 16
+    BUCKETS = 64 * SUB_BUCKETS
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.total = 0
+        # Calls left before the owning thread times one, see profiled().
+        self.countdown = 1
+
+    @staticmethod
+    def bucket(value):
+        """Return the index of the bucket counting the given value."""
+        shift = value.bit_length() - 5
+        return (shift + 1) * 16 + (value >> shift) - 16 if shift > 0 else value
+
+    @classmethod
+    def bucket_floor(cls, index):
+        """Return the smallest value falling in the given bucket."""
+        if index < 2 * cls.SUB_BUCKETS:
+            return index
+        shift = index // cls.SUB_BUCKETS - 1
+        return (index % cls.SUB_BUCKETS + cls.SUB_BUCKETS) << shift
+
+    def record(self, value):
+        """Count one duration, in nanoseconds."""
+        self.counts[self.bucket(value)] += 1
+        self.total += value
+
+    def merge(self, other):
+        """Add the counts of another histogram to this one."""
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        self.total += other.total
+
+    @property
+    def count(self):
+        """Number of recorded values."""
+        return sum(self.counts)
+
+    def percentile(self, percent):
+        """Return the bucket floor below which `percent`% of the values fall."""
+        rank = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return self.bucket_floor(index)
+        return 0
+
+    def summary(self):
+        """Return count, mean, p50 / p90 / p99 and max (bucket floors), in nanoseconds."""
+        count = self.count
+        return {
+            'count': count,
+            'mean_ns': self.total / count if count else 0,
+            'p50_ns': self.percentile(50),
+            'p90_ns': self.percentile(90),
+            'p99_ns': self.percentile(99),
+            'max_ns': self.percentile(100),
+        }
+
+
+class FunctionProfile:
+    """
+    Durations of one profiled function, kept in one histogram per thread.
+
+    Each thread only writes to its own histogram, found by thread id in a
+    plain dict, so the call path takes no lock and does no I/O. Snapshots
+    merge all of them.
+    """
+
+    def __init__(self, name, sample_every=1):
+        self.name = name
+        self.sample_every = sample_every
+        self.histograms = {}
+
+    def thread_histogram(self):
+        """Return the histogram of the calling thread, creating it on first use."""
+        histogram = LatencyHistogram()
+        histogram.countdown = self.sample_every
+        return self.histograms.setdefault(threading.get_ident(), histogram)
+
+    def snapshot(self):
+        """Return a new histogram merging what every thread recorded so far."""
+        merged = LatencyHistogram()
+        for histogram in list(self.histograms.values()):
+            merged.merge(histogram)
+        return merged
+
+    def reset(self):
+        """Forget everything recorded so far."""
+        for histogram in list(self.histograms.values()):
+            histogram.counts = [0] * LatencyHistogram.BUCKETS
+            histogram.total = 0
+
+
+PROFILES = {}
+
+
+def profiled(func=None, *, sample_every=1):
+    """
+    Decorator recording how long calls of func take, in PROFILES.
+
+    Use it bare (@profiled) or with a sampling rate: @profiled(sample_every=100)
+    times one call in a hundred per thread. Read the results with
+    profile_snapshots() or wrapper.profile.snapshot(), clear them with
+    reset_profiles(). Decorating another function with the same qualified
+    name replaces its entry in PROFILES.
+
+    Raises:
+        ValueError: If sample_every is not an integer of at least 1.
+    """
+    if not isinstance(sample_every, int) or sample_every < 1:
+        raise ValueError(f'sample_every must be an integer >= 1, not {sample_every!r}')
+    if func is None:
+        return functools.partial(profiled, sample_every=sample_every)
+    profile = FunctionProfile(f'{func.__module__}.{func.__qualname__}', sample_every)
+    PROFILES[profile.name] = profile
+    histograms = profile.histograms
+    get_ident = threading.get_ident
+    clock = time.perf_counter_ns
+
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        start = clock()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = clock() - start
+            histogram = histograms.get(get_ident()) or profile.thread_histogram()
+            histogram.record(elapsed)
+
+    @functools.wraps(func)
+    def sampled(*args, **kwargs):
+        histogram = histograms.get(get_ident()) or profile.thread_histogram()
+        histogram.countdown -= 1
+        if histogram.countdown:
+            return func(*args, **kwargs)
+        histogram.countdown = sample_every
+        start = clock()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            histogram.record(clock() - start)
+
+    wrapper = timed if sample_every == 1 else sampled
+    wrapper.profile = profile
+    return wrapper
+
+
+def profile_snapshots():
+    """Return {function name: summary dict} for every profiled function."""
+    return {name: profile.snapshot().summary() for name, profile in PROFILES.items()}
+
+
+def reset_profiles():
+    """Reset the histograms of every profiled function."""
+    for profile in PROFILES.values():
+        profile.reset()
+
+
+def measure_overhead(calls=1000000):
+    """Print the per call cost @profiled adds to an empty function."""
+    def bare(value):
+        return value
+    for label, func in (('bare', bare), ('profiled', profiled(bare)),
+                        ('profiled 1/100', profiled(sample_every=100)(bare))):
+        start = time.perf_counter_ns()
+        for value in range(calls):
+            func(value)
+        print(f'>>> {label:>14} : {(time.perf_counter_ns() - start) / calls:.0f}ns per call')
+    PROFILES.pop(f'{__name__}.measure_overhead.<locals>.bare', None)
+
+
+# Lock files backing claim_worker_id(), one per worker id, shared by every
+# process of this host.
+WORKER_DIR = os.path.join(tempfile.gettempdir(), 'design-patterns-id-workers')
+
+
+def _try_lock(fd):
+    """Take an exclusive lock on an open file without waiting, True on success."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def claim_worker_id(directory=WORKER_DIR):
+    """
+    Claim a worker id that no other live generator of this host holds.
+
+    Worker n is held by an exclusive lock on directory/worker-n.lock. The
+    lock goes away with the file descriptor, i.e. at the latest when the
+    process dies, so the ids of dead processes are handed out again.
+
+    Returns:
+        tuple: The worker id and the file descriptor holding it.
+
+    Raises:
+        RuntimeError: If all the worker ids are taken.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for worker_id in range(1 << IdGenerator.WORKER_BITS):
+        path = os.path.join(directory, f'worker-{worker_id}.lock')
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if _try_lock(fd):
+            return worker_id, fd
+        os.close(fd)
+    raise RuntimeError('Every worker id of this host is taken')
+
+
+class IdGenerator:
+    """
+    Snowflake style 63 bit IDs: milliseconds since EPOCH_MS, worker id, sequence.
+
+    IDs from one generator are strictly increasing, even across threads (a
+    lock guards the state) and when the wall clock steps back (the last
+    millisecond is kept). When the 4096 sequence numbers of a millisecond
+    run out the generator moves on to the next millisecond instead of
+    sleeping.
+
+    Generators are kept apart by their worker id. Unless one is given, it is
+    claimed with claim_worker_id() and held as long as the generator lives,
+    so no two generators of the host share it. A forked child claims its
+    own; a generator given an explicit worker id refuses to make IDs in a
+    forked child until it is given another one, since the parent still uses
+    it.
+
+    default() is the generator behind generate_id(), only created when
+    first needed, so importing the module claims nothing.
+    """
+
+    EPOCH_MS = 1672531200000  # 2023-01-01T00:00:00Z
+    WORKER_BITS = 10
+    SEQUENCE_BITS = 12
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, worker_id=None):
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+        self._release = None
+        if worker_id is None:
+            self._claim()
+        else:
+            self.worker_id = worker_id
+        _GENERATORS.add(self)
+
+    @property
+    def worker_id(self):
+        """The worker id, None in a forked child until given a new one."""
+        return self._worker_id
+
+    @worker_id.setter
+    def worker_id(self, worker_id):
+        if not 0 <= worker_id < 1 << self.WORKER_BITS:
+            raise ValueError(f'worker_id must be in [0, {1 << self.WORKER_BITS})')
+        if self._release is not None:
+            self._release()
+            self._release = None
+        self._worker_id = worker_id
+
+    @classmethod
+    def default(cls):
+        """Return the generator shared by generate_id(), creating it on first use."""
+        if IdGenerator._default is None:
+            with IdGenerator._default_lock:
+                if IdGenerator._default is None:
+                    IdGenerator._default = IdGenerator()
+        return IdGenerator._default
+
+    def _claim(self):
+        """Claim a worker id, held until the generator is collected."""
+        self._worker_id, fd = claim_worker_id()
+        self._release = weakref.finalize(self, os.close, fd)
+
+    def after_fork(self):
+        """
+        Make the generator safe to use in a forked child: fresh lock, and a
+        freshly claimed worker id unless it was given one.
+        """
+        self._lock = threading.Lock()
+        if self._release is not None:
+            # The parent holds the lock through its own descriptor.
+            self._release()
+            self._claim()
+        else:
+            self._worker_id = None
+
+    def next_ints(self, count=1):
+        """Reserve `count` consecutive IDs and return them as a list of ints."""
+        ids = []
+        with self._lock:
+            if self._worker_id is None:
+                raise RuntimeError('Forked child: set worker_id before making IDs')
+            now = time.time_ns() // 1000000 - self.EPOCH_MS
+            if now > self._last_ms:
+                self._last_ms, self._sequence = now, 0
+            while count:
+                if self._sequence >> self.SEQUENCE_BITS:
+                    self._last_ms, self._sequence = self._last_ms + 1, 0
+                base = ((self._last_ms << self.WORKER_BITS | self._worker_id)
+                        << self.SEQUENCE_BITS)
+                take = min(count, (1 << self.SEQUENCE_BITS) - self._sequence)
+                ids.extend(range(base + self._sequence, base + self._sequence + take))
+                self._sequence += take
+                count -= take
+        return ids
+
+    def generate(self, classname, count=1):
+        """Return `count` IDs as CLASSNAME followed by 16 hex digits, sortable as strings."""
+        prefix = classname.upper()
+        return [f'{prefix}{value:016X}' for value in self.next_ints(count)]
+
+    @classmethod
+    def decode(cls, value):
+        """Split an ID (int, or string as made by generate) in (unix ms, worker, sequence)."""
+        if isinstance(value, str):
+            value = int(value[-16:], 16)
+        sequence = value & ((1 << cls.SEQUENCE_BITS) - 1)
+        worker = (value >> cls.SEQUENCE_BITS) & ((1 << cls.WORKER_BITS) - 1)
+        return ((value >> (cls.SEQUENCE_BITS + cls.WORKER_BITS)) + cls.EPOCH_MS,
+                worker, sequence)
+
+
+# Every live generator, so a single fork hook resets them all.
+_GENERATORS = weakref.WeakSet()
+
+
+def _after_fork():
+    """Reset every generator in a forked child."""
+    IdGenerator._default_lock = threading.Lock()  # pylint: disable=protected-access
+    for generator in list(_GENERATORS):
+        generator.after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
 def generate_id(classname):
-        return classname.upper() + "".join(random.choices(string.ascii_uppercase, k=12))
+    return IdGenerator.default().generate(classname)[0]
+
+
+def generate_ids(classname, count):
+    """Return `count` IDs shaped like generate_id()'s, reserved in one go."""
+    return IdGenerator.default().generate(classname, count)
+
+
+def benchmark_ids(count=1000000):
+    """Print how many IDs per second generate_id() and generate_ids() make."""
+    start = time.perf_counter()
+    for _ in range(count // 10):
+        generate_id('Person')
+    single = count // 10 / (time.perf_counter() - start)
+    start = time.perf_counter()
+    generate_ids('Person', count)
+    batch = count / (time.perf_counter() - start)
+    print(f'>>> generate_id : {single:,.0f} IDs/s, generate_ids : {batch:,.0f} IDs/s')
+
+
+@dataclass
+class LatencyModel:
+    """Simulated delay of creating records, e.g. a slow upstream service."""
+    per_record: float = 1.0
+
+    def __call__(self, records=1) -> None:
+        time.sleep(self.per_record * records)
+
+
+# IDs reserved by Person.create_many() for the people it builds, per thread.
+_BATCH = threading.local()
+
 
 @dataclass
 class Person:
@@ -22,20 +420,215 @@ class Person:
     address: str
     age: int
     id: str = field(init=False) #, default_factory=generate_id)
-    _search_string: str = field(init=False, repr=False)
+    _search_string: str = field(default=None, init=False, repr=False, compare=False)
+    # No delay unless a LatencyModel is injected, e.g. Person.latency = LatencyModel(1)
+    latency: ClassVar[Optional[LatencyModel]] = None
 
     def __post_init__(self) -> None:
+        ids = getattr(_BATCH, 'ids', None)
+        if ids is not None:
+            # Built by create_many(), which reserved the ID.
+            self.id = next(ids)
+            return
         print(f'{type(self).__name__}')
         self.id = generate_id(classname=f'{type(self).__name__}')
-        self._search_string = f'{self.name} {self.address}'
-        time.sleep(1)
+        if self.latency is not None:
+            self.latency(1)
+
+    def __setattr__(self, name, value) -> None:
+        super().__setattr__(name, value)
+        if name in ('name', 'address'):
+            self.__dict__['_search_string'] = None
+            for index in self.indexes:
+                index.refresh(self)
+
+    @property
+    def indexes(self) -> tuple:
+        """The PersonIndex objects this person is indexed in."""
+        return tuple(self.__dict__.get('_indexes', ()))
+
+    @property
+    def search_string(self) -> str:
+        """'name address', built on first use and again after either changes."""
+        if self._search_string is None:
+            self.__dict__['_search_string'] = f'{self.name} {self.address}'
+        return self._search_string
+
+    @classmethod
+    def create_many(cls, rows):
+        """
+        Create many people at memory speed.
+
+        rows are (name, email, address, age) sequences or dicts with those
+        keys. Every person goes through the class constructor, so subclasses
+        run their own init logic, but the IDs come from one generate_ids()
+        call, nothing is printed and the latency model, if any, is applied
+        once for the whole batch.
+
+        Raises:
+            ValueError: If a sequence row does not hold exactly 4 values.
+            TypeError: If a dict row misses a field or has an unknown one.
+        """
+        rows = list(rows)
+        _BATCH.ids = iter(generate_ids(cls.__name__, len(rows)))
+        try:
+            people = []
+            for row in rows:
+                if isinstance(row, dict):
+                    people.append(cls(**row))
+                else:
+                    name, email, address, age = row
+                    people.append(cls(name, email, address, age))
+        finally:
+            _BATCH.ids = None
+        if cls.latency is not None:
+            cls.latency(len(people))
+        return people
 
     def __str__(self) -> str:
         print(f'{type(self).__name__}')
         return f'{self.name} lives in {self.address}'
 
+
+_TOKEN = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Split text in lowercase word tokens."""
+    return _TOKEN.findall(text.lower())
+
+
+class PersonIndex:
+    """
+    Inverted index over Person.search_string.
+
+    Every token maps to a posting list of person IDs (a dict, so insertion
+    ordered with O(1) removal). The index is owned by its caller: only the
+    people added to it know about it (see Person.indexes), so reassigning
+    the name or address of an indexed person re-indexes it in the indexes
+    holding that person and no other. The sorted token list used by prefix
+    search is rebuilt lazily, only after the vocabulary changed.
+    """
+
+    def __init__(self, people=()):
+        self.postings = {}
+        self.people = {}
+        self._tokens = {}
+        self._vocabulary = None
+        self.add_many(people)
+
+    def close(self):
+        """Drop every person, so that none of them refers to the index."""
+        for person in list(self.people.values()):
+            self.remove(person)
+
+    def add(self, person):
+        """Index one person, replacing what was indexed for the same ID."""
+        if person.id in self.people:
+            self.remove(self.people[person.id])
+        tokens = set(tokenize(person.search_string))
+        person.__dict__.setdefault('_indexes', []).append(self)
+        self.people[person.id] = person
+        self._tokens[person.id] = tokens
+        for token in tokens:
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = {}
+                self._vocabulary = None
+            posting[person.id] = None
+
+    def add_many(self, people):
+        """Index every person of an iterable, see add()."""
+        for person in people:
+            self.add(person)
+
+    def remove(self, person):
+        """Drop a person from the index and stop following its changes."""
+        del self.people[person.id]
+        person.__dict__['_indexes'].remove(self)
+        for token in self._tokens.pop(person.id):
+            posting = self.postings[token]
+            del posting[person.id]
+            if not posting:
+                del self.postings[token]
+                self._vocabulary = None
+
+    def refresh(self, person):
+        """Re-index a person whose name or address changed, if it is indexed."""
+        if self.people.get(person.__dict__.get('id')) is person:
+            self.add(person)
+
+    def _matching(self, token, prefix):
+        """Return the posting lists of token, or of every token it prefixes."""
+        if not prefix:
+            posting = self.postings.get(token)
+            return [posting] if posting else []
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        start = bisect.bisect_left(self._vocabulary, token)
+        stop = bisect.bisect_left(self._vocabulary, token + '\U0010ffff')
+        return [self.postings[word] for word in self._vocabulary[start:stop]]
+
+    def search(self, query, prefix=False, limit=None):
+        """
+        Return the IDs of the people matching every token of query.
+
+        With prefix=True a query token also matches the tokens it starts
+        ("bang" matches "bangalore"). At most `limit` IDs are returned.
+        """
+        candidates = []
+        for token in set(tokenize(query)):
+            postings = self._matching(token, prefix)
+            if not postings:
+                return []
+            candidates.append(postings[0] if len(postings) == 1
+                              else dict.fromkeys(id_ for posting in postings for id_ in posting))
+        if not candidates:
+            return []
+        candidates.sort(key=len)
+        found = []
+        for person_id in candidates[0]:
+            if all(person_id in other for other in candidates[1:]):
+                found.append(person_id)
+                if len(found) == limit:
+                    break
+        return found
+
+
+def benchmark_create(count=10000):
+    """Compare creating people one by one (prints silenced) with create_many()."""
+    rows = [(f'Person {i}', f'person{i}@ainebula.in', 'Bangalore, India', 30) for i in range(count)]
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for row in rows:
+            Person(*row)
+    single = time.perf_counter() - start
+    start = time.perf_counter()
+    Person.create_many(rows)
+    bulk = time.perf_counter() - start
+    print(f'>>> {count} people one by one : {int(single * 1000)}ms, '
+          f'create_many : {int(bulk * 1000)}ms')
+
+
+def benchmark_search(count=300000):
+    """Index `count` people and time a few searches."""
+    cities = ('Bangalore, India', 'Paris, France', 'Pune, India')
+    people = Person.create_many((f'Person {i}', f'person{i}@ainebula.in',
+                                 f'{cities[i % 3]} {i % 1000}', 30) for i in range(count))
+    start = time.perf_counter()
+    index = PersonIndex(people)
+    print(f'>>> indexed {count} people in {int((time.perf_counter() - start) * 1000)}ms')
+    for query in ('Bangalore 17', 'person 12345', 'Bangalore'):
+        start = time.perf_counter()
+        found = index.search(query, limit=100)
+        print(f'>>> search({query!r}) : {len(found)} hits '
+              f'in {(time.perf_counter() - start) * 1000:.3f}ms')
+    index.close()
+
+
 @timeit
 def main() -> None:
+    Person.latency = LatencyModel(1)
     person = Person(name="Amitabh", email="amitabh@ainebula.in", address="India", age=31)
     print(person)
     print(repr(person))
@@ -43,9 +636,14 @@ def main() -> None:
     print("After change")
     print(person)
     print(repr(person))
+    Person.latency = None
 
 if __name__ == '__main__':
     main()
+    measure_overhead()
+    benchmark_create()
+    benchmark_search()
+    benchmark_ids()
 
 
 OUTPUT = r"""
@@ -54,7 +652,16 @@ Person
 Amitabh lives in India
 Person(
     name='Amitabh', email='amitabh@ainebula.in',
-    address='India', age=31, id='PERSONGDCGFANNDDDW'
+    address='India', age=31, id='PERSON06FA58BEC54AD2FE'
     )
 >>> Total time taken : 1009ms
+>>>           bare : 40ns per call
+>>>       profiled : 725ns per call
+>>> profiled 1/100 : 340ns per call
+>>> 10000 people one by one : 43ms, create_many : 13ms
+>>> indexed 300000 people in 2785ms
+>>> search('Bangalore 17') : 100 hits in 0.545ms
+>>> search('person 12345') : 1 hits in 0.019ms
+>>> search('Bangalore') : 100 hits in 0.074ms
+>>> generate_id : 242,839 IDs/s, generate_ids : 1,459,263 IDs/s
 """
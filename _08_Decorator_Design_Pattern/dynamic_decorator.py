@@ -1,5 +1,12 @@
 from dataclasses import dataclass, field
-from typing import Any, Iterator
+from typing import Any, Callable, Iterator
+import mmap
+import os
+import queue
+import tempfile
+import threading
+import time
+import weakref
 
 @dataclass
 class FileWithLogging:
@@ -19,6 +26,24 @@ class FileWithLogging:
 
     file: Any
 
+    def __post_init__(self) -> None:
+        """
+        Binds the hot methods of the file on the instance so calling them
+        does not go through __getattr__ each time.
+        """
+        self._bind_hot_methods()
+
+    def _bind_hot_methods(self) -> None:
+        """
+        Stores the file's read and write as instance attributes, found by the
+        normal attribute lookup before __getattr__ is ever tried. Methods the
+        decorator, or any decorator it derives from, defines itself are left
+        alone.
+        """
+        for name in ('read', 'write'):
+            if getattr(type(self), name, None) is None and hasattr(self.file, name):
+                self.__dict__[name] = getattr(self.file, name)
+
     def writelines(self, strings):
         """
         Writes multiple strings to the file and logs the number of lines written.
@@ -78,6 +103,9 @@ class FileWithLogging:
         """
         if __name == "file":
             self.__dict__[__name] = __value
+            self._bind_hot_methods()
+        elif __name in self.__dataclass_fields__:
+            self.__dict__[__name] = __value
         else:
             setattr(self.file, __name, __value)
     
@@ -94,6 +122,653 @@ class FileWithLogging:
         delattr(self.file, __name)
 
 
+@dataclass
+class WriteStats:
+    """
+    Mutable state of a BufferedFileWithLogging: the pending buffer and the
+    counters. Kept apart so updating it does not go through the decorator's
+    delegating __setattr__, and so it can be flushed at exit without
+    keeping the decorator alive.
+    """
+
+    buffer: list = field(default_factory=list)
+    pending: int = 0
+    last_flush: float = field(default_factory=time.monotonic)
+    writes: int = 0
+    lines: int = 0
+    chars: int = 0
+    flushes: int = 0
+
+    def counters(self) -> tuple:
+        """
+        Returns (writes, lines, chars, flushes).
+        """
+        return (self.writes, self.lines, self.chars, self.flushes)
+
+
+def _count_lines(text: str) -> int:
+    """
+    Returns the number of lines text holds, a last unterminated one included.
+    """
+    return text.count('\n') + (not text.endswith('\n')) if text else 0
+
+
+def _flush_pending(target, stats: WriteStats) -> None:
+    """
+    Hands the pending strings of a BufferedFileWithLogging to its file in one
+    write and pushes them down to the OS. Its lock must be held. Strings that
+    fail to be written are dropped, so they do not fail every later flush.
+    """
+    if stats.buffer:
+        try:
+            target.write(''.join(stats.buffer))
+            target.flush()
+        finally:
+            stats.buffer.clear()
+            stats.pending = 0
+        stats.flushes += 1
+    stats.last_flush = time.monotonic()
+
+
+def _flush_at_exit(target, stats: WriteStats, lock) -> None:
+    """
+    Finalizer of a BufferedFileWithLogging never closed: writes what is
+    still pending, if the file is still open.
+    """
+    with lock:
+        if not target.closed:
+            _flush_pending(target, stats)
+
+
+@dataclass
+class BufferedFileWithLogging(FileWithLogging):
+    """
+    FileWithLogging variant buffering writes and logging in the background.
+
+    Strings given to write / writelines are collected in memory and handed
+    to the file in one write when any flush policy triggers: `buffer_size`
+    characters pending, `flush_lines` strings pending, or `flush_interval`
+    seconds since the last flush (checked on write and by the reporter).
+    Instead of a print per call, counters are aggregated and a daemon thread
+    calls `report` with what was written every `report_interval` seconds.
+    An error raised by a background flush is raised again by the next call;
+    what is still pending when the interpreter exits is flushed, even if
+    close() was never called.
+
+    Call flush() before reading back from a file opened for both reading and
+    writing, read is bound straight to the file.
+
+    Args:
+        file: The file object to wrap.
+        buffer_size: Pending characters that trigger a flush.
+        flush_lines: Pending strings that trigger a flush, 0 to disable.
+        flush_interval: Seconds after which a flush is due, 0 to disable.
+        report_interval: Seconds between two reports, 0 to disable.
+        report: Called with each report line.
+    """
+
+    buffer_size: int = 64 * 1024
+    flush_lines: int = 0
+    flush_interval: float = 0
+    report_interval: float = 1.0
+    report: Callable[[str], Any] = print
+
+    def __post_init__(self) -> None:
+        """
+        Starts the reporter thread once the fields are set.
+        """
+        super().__post_init__()
+        self.__dict__['stats'] = WriteStats()
+        self.__dict__['_lock'] = threading.Lock()
+        self.__dict__['_closed'] = threading.Event()
+        self.__dict__['_reporter'] = None
+        self.__dict__['_reported'] = (0, 0, 0, 0)
+        self.__dict__['_errors'] = []
+        self.__dict__['_finalizer'] = weakref.finalize(
+            self, _flush_at_exit, self.file, self.stats, self._lock)
+        if self.report_interval or self.flush_interval:
+            reporter = threading.Thread(target=self._run_reporter, daemon=True)
+            self.__dict__['_reporter'] = reporter
+            reporter.start()
+
+    def _flush_buffer(self) -> None:
+        """
+        Hands the pending strings to the file in one write and pushes them
+        down to the OS. The lock must be held.
+        """
+        _flush_pending(self.file, self.stats)
+
+    def _raise_flush_error(self) -> None:
+        """
+        Raises, once, the first error a background flush ran into since the
+        last one raised, dropping the ones after it.
+        """
+        if self._errors:
+            error = self._errors[0]
+            self._errors.clear()
+            raise error
+
+    def _flush_due(self) -> bool:
+        """
+        Tells whether any flush policy is met.
+        """
+        stats = self.stats
+        return (stats.pending >= self.buffer_size
+                or 0 < self.flush_lines <= len(stats.buffer)
+                or (self.flush_interval > 0 and stats.buffer
+                    and time.monotonic() - stats.last_flush >= self.flush_interval))
+
+    def write(self, text: str) -> int:
+        """
+        Buffers one string, flushing if a policy says so.
+
+        Args:
+            text: The string to write.
+
+        Returns:
+            The number of characters buffered.
+        """
+        self._raise_flush_error()
+        with self._lock:
+            stats = self.stats
+            stats.buffer.append(text)
+            stats.pending += len(text)
+            stats.writes += 1
+            stats.lines += _count_lines(text)
+            stats.chars += len(text)
+            if self._flush_due():
+                self._flush_buffer()
+        return len(text)
+
+    def writelines(self, strings) -> None:
+        """
+        Buffers multiple strings, flushing if a policy says so.
+
+        Args:
+            strings: A sequence of strings to write to the file.
+        """
+        self._raise_flush_error()
+        strings = list(strings)
+        size = sum(map(len, strings))
+        with self._lock:
+            stats = self.stats
+            stats.buffer.extend(strings)
+            stats.pending += size
+            stats.writes += 1
+            stats.lines += _count_lines(''.join(strings))
+            stats.chars += size
+            if self._flush_due():
+                self._flush_buffer()
+
+    def flush(self) -> None:
+        """
+        Writes the pending strings and flushes the file.
+        """
+        self._raise_flush_error()
+        with self._lock:
+            self._flush_buffer()
+            self.file.flush()
+
+    def _report(self) -> None:
+        """
+        Reports what was written since the previous report, if anything.
+        """
+        current = self.stats.counters()
+        if current != self._reported:
+            writes, lines, chars, flushes = (now - before for now, before
+                                             in zip(current, self._reported))
+            self.__dict__['_reported'] = current
+            self.report(f'Wrote {lines} lines ({chars} chars in {writes} calls, '
+                        f'{flushes} flushes)')
+
+    def _run_reporter(self) -> None:
+        """
+        Background loop enforcing flush_interval and reporting the counters.
+        """
+        period = min(interval for interval in (self.report_interval, self.flush_interval)
+                     if interval > 0)
+        last_report = time.monotonic()
+        while not self._closed.wait(period):
+            with self._lock:
+                try:
+                    if self._flush_due():
+                        self._flush_buffer()
+                except Exception as error:  # pylint: disable=broad-except
+                    self._errors.append(error)
+            if self.report_interval and time.monotonic() - last_report >= self.report_interval:
+                last_report = time.monotonic()
+                self._report()
+
+    def close(self) -> None:
+        """
+        Flushes, stops the reporter, sends a last report and closes the file.
+
+        Raises:
+            Exception: The last error of a background flush not raised yet.
+        """
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._finalizer.detach()
+        if self._reporter is not None:
+            self._reporter.join()
+        try:
+            with self._lock:
+                self._flush_buffer()
+            if self.report_interval:
+                self._report()
+        finally:
+            self.file.close()
+        self._raise_flush_error()
+
+    def __enter__(self):
+        """
+        Returns the decorated file for use in a with statement.
+        """
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Closes the decorated file when leaving the with statement.
+        """
+        self.close()
+
+
+
+@dataclass
+class WriterMetrics:
+    """
+    Counters of a BackgroundFileWithLogging, updated by its writer thread.
+    Latencies run from the moment a write is queued until the batch holding
+    it has been written (and fsynced, if enabled).
+    """
+
+    written: int = 0
+    failed: int = 0
+    chars: int = 0
+    batches: int = 0
+    fsyncs: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+
+
+def _drain_at_exit(target, pending: queue.Queue, writer: threading.Thread) -> None:
+    """
+    Finalizer of a BackgroundFileWithLogging never closed: stops its writer
+    behind the writes still queued, waits for them and flushes the file.
+    """
+    pending.put(None)
+    writer.join()
+    if not target.closed:
+        target.flush()
+
+
+@dataclass
+class BackgroundFileWithLogging(FileWithLogging):
+    """
+    FileWithLogging variant handing every write to a dedicated writer thread.
+
+    write / writelines only put the strings on a bounded queue, so callers
+    never wait on the disk, unless the queue is full: then they block until
+    the writer catches up (backpressure), or raise queue.Full after
+    `put_timeout` seconds if one is set. The writer takes whatever is queued,
+    up to `max_batch` writes, and writes it in one call; with `fsync` it
+    also flushes and fsyncs once per batch (group commit). If that call
+    fails, the writes of the batch are tried one at a time, so a bad write
+    only loses itself.
+
+    flush() and close() wait until everything queued has been written. The
+    first error raised in the writer thread is raised again by the next
+    call, close() included. Once close() started, writes are rejected, so
+    none can be queued behind the writer's stop marker and get lost. Writes
+    still queued when the interpreter exits are written even if close()
+    was never called.
+
+    Args:
+        file: The file object to wrap.
+        queue_size: Most writes waiting in the queue.
+        max_batch: Most writes gathered in one batch.
+        fsync: Flush and fsync the file after every batch.
+        put_timeout: Seconds to wait on a full queue, None to wait forever.
+    """
+
+    queue_size: int = 1024
+    max_batch: int = 256
+    fsync: bool = False
+    put_timeout: Any = None
+
+    def __post_init__(self) -> None:
+        """
+        Starts the writer thread once the fields are set.
+        """
+        super().__post_init__()
+        self.__dict__['metrics'] = WriterMetrics()
+        self.__dict__['_queue'] = queue.Queue(self.queue_size)
+        self.__dict__['_errors'] = []
+        self.__dict__['_closing'] = False
+        # Orders write()'s closed check and put against close()'s.
+        self.__dict__['_state_lock'] = threading.Lock()
+        writer = threading.Thread(target=self._run_writer, daemon=True)
+        self.__dict__['_writer'] = writer
+        writer.start()
+        self.__dict__['_finalizer'] = weakref.finalize(
+            self, _drain_at_exit, self.file, self._queue, writer)
+
+    def _raise_writer_error(self) -> None:
+        """
+        Raises, once, the first error the writer thread ran into since the
+        last one raised, dropping the ones after it.
+        """
+        if self._errors:
+            error = self._errors[0]
+            self._errors.clear()
+            raise error
+
+    def _run_writer(self) -> None:
+        """
+        Writer thread: write queued strings batch by batch until close().
+        """
+        pending = self._queue
+        stop = False
+        while not stop:
+            batch = []
+            item = pending.get()
+            while True:
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.max_batch:
+                    break
+                try:
+                    item = pending.get_nowait()
+                except queue.Empty:
+                    break
+            try:
+                if batch:
+                    self._write_batch(batch)
+            except Exception as error:  # pylint: disable=broad-except
+                self._errors.append(error)
+            finally:
+                for _ in range(len(batch) + stop):
+                    pending.task_done()
+
+    def _write_batch(self, batch) -> None:
+        """
+        Writes one batch of (text, queued at) pairs and updates the metrics.
+        If it cannot be written in one call, its writes are written one at a
+        time and the failing ones are dropped, their errors kept for the
+        caller.
+        """
+        metrics = self.metrics
+        try:
+            text = ''.join(item for item, _ in batch)
+            self.file.write(text)
+        except Exception:  # pylint: disable=broad-except
+            written = []
+            for item in batch:
+                try:
+                    self.file.write(item[0])
+                except Exception as error:  # pylint: disable=broad-except
+                    metrics.failed += 1
+                    self._errors.append(error)
+                else:
+                    written.append(item)
+            batch = written
+            text = ''.join(item for item, _ in batch)
+        if self.fsync:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        done = time.perf_counter()
+        metrics.written += len(batch)
+        metrics.chars += len(text)
+        metrics.batches += 1
+        metrics.fsyncs += self.fsync
+        for _, queued_at in batch:
+            latency = done - queued_at
+            metrics.total_latency += latency
+            metrics.max_latency = max(metrics.max_latency, latency)
+
+    def write(self, text: str) -> int:
+        """
+        Queues one string for the writer thread.
+
+        Args:
+            text: The string to write.
+
+        Returns:
+            The number of characters queued.
+
+        Raises:
+            queue.Full: If put_timeout is set and the queue stayed full.
+            ValueError: If the file was closed.
+        """
+        self._raise_writer_error()
+        with self._state_lock:
+            if self._closing:
+                raise ValueError('I/O operation on closed file.')
+            self._queue.put((text, time.perf_counter()), timeout=self.put_timeout)
+        return len(text)
+
+    def writelines(self, strings) -> None:
+        """
+        Queues multiple strings for the writer thread, as one write.
+
+        Args:
+            strings: A sequence of strings to write to the file.
+        """
+        self.write(''.join(strings))
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        Number of writes waiting for the writer thread.
+        """
+        return self._queue.qsize()
+
+    def stats(self) -> dict:
+        """
+        Returns the queue depth and the write metrics, latencies in ms.
+        """
+        metrics = self.metrics
+        return {
+            'queue_depth': self.queue_depth,
+            'written': metrics.written,
+            'failed': metrics.failed,
+            'chars': metrics.chars,
+            'batches': metrics.batches,
+            'fsyncs': metrics.fsyncs,
+            'mean_latency_ms': (metrics.total_latency / metrics.written * 1000
+                                if metrics.written else 0.0),
+            'max_latency_ms': metrics.max_latency * 1000,
+        }
+
+    def flush(self) -> None:
+        """
+        Waits until every queued write is written, then flushes the file.
+        """
+        self._queue.join()
+        self._raise_writer_error()
+        self.file.flush()
+
+    def close(self) -> None:
+        """
+        Drains the queue, stops the writer thread and closes the file.
+        """
+        with self._state_lock:
+            if self._closing:
+                return
+            self.__dict__['_closing'] = True
+            self._finalizer.detach()
+            self._queue.put(None)
+        self._writer.join()
+        self.file.close()
+        self._raise_writer_error()
+
+    def __enter__(self):
+        """
+        Returns the decorated file for use in a with statement.
+        """
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Closes the decorated file when leaving the with statement.
+        """
+        self.close()
+
+
+@dataclass
+class MappedFileWithLogging(FileWithLogging):
+    """
+    Read-only FileWithLogging variant scanning the file through mmap.
+
+    Lines come out as bytes (or zero-copy memoryview) slices of the mapping
+    instead of one decoded str per line, chunks are large line-aligned
+    memoryviews, and find_all / grep search with mmap.find, in C, only
+    building the lines that match. The file can be opened in text or binary
+    mode, the mapping always works on bytes.
+
+    Memoryviews handed out must be released before close().
+
+    Args:
+        file: The file object to wrap, opened for reading.
+    """
+
+    def __post_init__(self) -> None:
+        """
+        Maps the whole file, an empty file maps to b''.
+        """
+        super().__post_init__()
+        size = os.fstat(self.file.fileno()).st_size
+        self.__dict__['data'] = (mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+                                 if size else b'')
+
+    def iter_lines(self, as_memoryview: bool = False) -> Iterator[bytes]:
+        """
+        Yields every line, newline included.
+
+        Args:
+            as_memoryview: Yield memoryview slices instead of bytes copies.
+        """
+        data = self.data
+        view = memoryview(data) if as_memoryview else data
+        start, size = 0, len(data)
+        while start < size:
+            end = data.find(b'\n', start) + 1 or size
+            yield view[start:end]
+            start = end
+
+    def __iter__(self) -> Iterator[bytes]:
+        """
+        Returns an iterator over the lines of the file, as bytes.
+        """
+        return self.iter_lines()
+
+    def iter_chunks(self, size: int = 1 << 20) -> Iterator[memoryview]:
+        """
+        Yields memoryviews of about `size` bytes, each ending on a line end
+        (a line longer than size is yielded whole).
+
+        Args:
+            size: Target size of a chunk in bytes.
+        """
+        data = self.data
+        view = memoryview(data)
+        start, total = 0, len(data)
+        while start < total:
+            end = start + size
+            if end >= total:
+                end = total
+            else:
+                end = data.find(b'\n', end - 1) + 1 or total
+            yield view[start:end]
+            start = end
+
+    def find_all(self, pattern: bytes) -> Iterator[int]:
+        """
+        Yields the offset of every occurrence of pattern.
+
+        Args:
+            pattern: Bytes to look for.
+        """
+        data = self.data
+        offset = data.find(pattern)
+        while offset != -1:
+            yield offset
+            offset = data.find(pattern, offset + 1)
+
+    def grep(self, pattern: bytes) -> Iterator[bytes]:
+        """
+        Yields each line containing pattern once, newline included.
+
+        Args:
+            pattern: Bytes to look for.
+
+        Raises:
+            ValueError: If pattern is empty.
+        """
+        if not pattern:
+            raise ValueError('grep needs a non-empty pattern')
+        data = self.data
+        size = len(data)
+        offset = data.find(pattern)
+        while offset != -1:
+            start = data.rfind(b'\n', 0, offset) + 1
+            end = data.find(b'\n', offset + len(pattern) - 1) + 1 or size
+            yield data[start:end]
+            offset = data.find(pattern, end)
+
+    def close(self) -> None:
+        """
+        Unmaps and closes the file.
+        """
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        """
+        Returns the decorated file for use in a with statement.
+        """
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Closes the decorated file when leaving the with statement.
+        """
+        self.close()
+
+
+def benchmark_scan(lines: int = 1000000, pattern: str = 'ERROR') -> None:
+    """
+    Compares grepping a generated log through plain line iteration and
+    through MappedFileWithLogging.grep.
+
+    Args:
+        lines: Number of lines of the generated log.
+        pattern: Text to look for, one line in a thousand has it.
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'scan.log')
+        with open(path, 'w', encoding='utf-8') as log:
+            log.writelines(f'2023-06-01 12:00:{i % 60:02} {"ERROR" if i % 1000 == 0 else "INFO"} '
+                           f'request {i} served in {i % 97}ms\n' for i in range(lines))
+        megabytes = os.path.getsize(path) / 1e6
+
+        start = time.perf_counter()
+        with open(path, encoding='utf-8') as log:
+            plain = sum(1 for line in FileWithLogging(log) if pattern in line)
+        plain_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with open(path, 'rb') as log, MappedFileWithLogging(log) as mapped_file:
+            mapped = sum(1 for _ in mapped_file.grep(pattern.encode()))
+        mapped_time = time.perf_counter() - start
+    print(f'line iteration : {plain} matches in {megabytes / plain_time:.0f}MB/s')
+    print(f'mmap grep      : {mapped} matches in {megabytes / mapped_time:.0f}MB/s')
+
+
 if __name__ == '__main__':
     # Usage example
     file = FileWithLogging(open("hello_world.txt", 'w'))
@@ -104,4 +779,20 @@ if __name__ == '__main__':
     for line in file:
         print(line.strip() + '\n')
     file.close()
+
+    with BufferedFileWithLogging(open("hello_world.txt", 'w', encoding='utf-8'),
+                                 flush_lines=2) as file:
+        file.write("Hey")
+        file.writelines(["Amitabh"])
+
+    with BackgroundFileWithLogging(open("hello_world.txt", 'w', encoding='utf-8'),
+                                   fsync=True) as file:
+        file.write("Hey")
+        file.writelines(["Amitabh"])
+        file.flush()
+        print(file.stats())
+
+    with MappedFileWithLogging(open("hello_world.txt", 'rb')) as file:
+        print(list(file), list(file.grep(b"Amitabh")))
+    benchmark_scan()
     
\ No newline at end of file
@@ -12,124 +12,437 @@ Let's see here.
 
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from collections import namedtuple
 from dataclasses import dataclass, field
-from enum import Enum
-import abc
-from abc import ABCMeta
+from typing import Any
+import contextlib
+import functools
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 
-State = Enum("State", "new running sleeping restart zombie")
+try:
+    from .servers import (UP_STATES, WORKER_SOURCE, BatchResult, FileInfo,
+                          FileServer, ProcessServer, State)
+except ImportError:
+    from servers import (UP_STATES, WORKER_SOURCE, BatchResult, FileInfo,
+                         FileServer, ProcessServer, State)
 
-@dataclass
-class Server(metaclass=ABCMeta):
+LifecycleReport = namedtuple('LifecycleReport', 'action waves timings wall')
+
+
+def dependency_waves(servers, reverse=False, ready=()):
     """
-    Abstract base class for servers.
+    Groups servers in waves: every server of a wave only depends on servers
+    of the previous waves, so a whole wave can be handled concurrently.
+
+    Args:
+        servers (list): Servers, each naming its dependencies in depends_on.
+        reverse (bool): Dependents first, the order to shut down in.
+        ready (set): Names of servers outside the list that can be
+            depended on, e.g. already running ones.
+
+    Returns:
+        list: Lists of servers, in the order to handle them.
+
+    Raises:
+        ValueError: If two servers have the same name, a dependency is
+            unknown or the dependencies loop.
     """
-    @abc.abstractmethod
-    def boot(self):
-        """
-        Abstract method for booting the server.
-        """
-        pass
+    by_name = {server.name: server for server in servers}
+    if len(by_name) != len(servers):
+        names = [server.name for server in servers]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        raise ValueError(f'Several servers called {duplicates}')
+    waiting = {}
+    for server in servers:
+        unknown = set(server.depends_on) - by_name.keys() - set(ready)
+        if unknown:
+            raise ValueError(f'{server.name} depends on unknown {sorted(unknown)}')
+        waiting[server.name] = set(server.depends_on) & by_name.keys()
+    waves = []
+    while waiting:
+        ready = [name for name, pending in waiting.items() if not pending]
+        if not ready:
+            raise ValueError(f'Dependency cycle between {sorted(waiting)}')
+        for name in ready:
+            del waiting[name]
+        for pending in waiting.values():
+            pending.difference_update(ready)
+        waves.append([by_name[name] for name in ready])
+    return waves[::-1] if reverse else waves
 
-    @abc.abstractmethod
-    def kill(self):
-        """
-        Abstract method for killing the server.
-        """
-        pass
 
+def needs(*attrs):
+    """
+    Declares the servers a facade method uses. They are constructed and
+    booted, with their dependencies, the first time the method is called,
+    and are not stopped as idle while a call runs.
+
+    Args:
+        attrs (str): Attributes of the OperatingSystem holding the servers.
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.using(*attrs):
+                return method(self, *args, **kwargs)
+        wrapper.needs = attrs
+        return wrapper
+    return decorate
+
+
+# The polling options, the counters and the per server backoff state are
+# each read on their own by metrics() and the tests.
+# pylint: disable=too-many-instance-attributes
 @dataclass
-class FileServer(Server):
+class HealthMonitor:
     """
-    Concrete implementation of FileServer server.
+    Polls the health of the servers of an OperatingSystem from a background
+    thread, every `interval` seconds give or take `jitter` (a fraction), so
+    that many monitors do not all poll at once.
+
+    A running server failing its health check becomes a zombie and is
+    restarted, unless a facade call is using it: then the restart waits for
+    a poll where it is idle. If it is still unhealthy after that, the next
+    attempt waits `backoff` seconds, doubling with every failure up to
+    `max_backoff`. `errors` keeps the exception of the last failed restart
+    of a server.
     """
-    name: str = 'FileServer'
-    state: Enum = State.new
+    system: Any
+    interval: float = 1.0
+    jitter: float = 0.2
+    backoff: float = 0.5
+    max_backoff: float = 30.0
+    polls: int = 0
+    zombies: int = 0
+    failures: dict = field(default_factory=dict)
+    errors: dict = field(default_factory=dict)
+    retry_at: dict = field(default_factory=dict)
+    _stopped: threading.Event = field(default_factory=threading.Event, init=False, repr=False)
 
-    def boot(self):
-        print(f'{self.name} booted up!')
-    
-    def kill(self, restart=True):
-        print(f'{self.name} killed!')
-        if restart:
-            print(f'{self.name} restarted!')
-    
-    def create_file(self, user, name, permission):
+    def _jittered(self, seconds: float) -> float:
+        return seconds * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def poll(self, now=None) -> list:
         """
-        Create a file for a user with the specified name and permission.
+        Checks every server once, turning the unhealthy running ones into
+        zombies, and restarts the zombies whose backoff is over and that no
+        facade call is using.
 
         Args:
-            user (str): User for whom the file is created.
-            name (str): Name of the file.
-            permission (str): Permission of the file.
+            now (float): time.monotonic() value to compare the backoffs with.
 
         Returns:
-            str: Message indicating the file creation.
+            list: Names of the servers restarted successfully.
         """
-        return f'Created file for user {user} ({name} with permissions: {permission})'
-    
-
-@dataclass
-class ProcessServer(Server):
-    """
-    Concrete implementation of ProcessServer server.
-    """
-    name: str = 'ProcessServer'
-    state: Enum = State.new
+        now = time.monotonic() if now is None else now
+        self.polls += 1
+        restarted = []
+        with self.system._lock:  # pylint: disable=protected-access
+            for server in self.system._constructed():  # pylint: disable=protected-access
+                name = server.name
+                if server.state is State.running and not server.healthy():
+                    server.transition(State.zombie)
+                    self.zombies += 1
+                if server.state is not State.zombie or now < self.retry_at.get(name, now) \
+                        or self.system.in_flight.get(name):
+                    continue
+                try:
+                    server.kill(restart=True)
+                # A failed restart is retried with backoff like an unhealthy one
+                except Exception as error:  # pylint: disable=broad-except
+                    self.errors[name] = error
+                if server.state is State.running and server.healthy():
+                    self.failures.pop(name, None)
+                    self.retry_at.pop(name, None)
+                    self.errors.pop(name, None)
+                    restarted.append(name)
+                    continue
+                if server.state is not State.zombie:
+                    server.transition(State.zombie)
+                failures = self.failures[name] = self.failures.get(name, 0) + 1
+                self.retry_at[name] = now + self._jittered(
+                    min(self.max_backoff, self.backoff * 2 ** (failures - 1)))
+        return restarted
 
-    def boot(self):
-        print(f'{self.name} booted up!')
-    
-    def kill(self, restart=True):
-        print(f'{self.name} killed!')
-        if restart:
-            print(f'{self.name} restarted!')
-    
-    def create_process(self, user, name):
+    def start(self) -> None:
+        """
+        Starts polling in a daemon thread.
         """
-        Create a process for a user with the specified name.
+        threading.Thread(target=self._poll_forever, name='health-monitor', daemon=True).start()
 
-        Args:
-            user (str): User for whom the process is created.
-            name (str): Name of the process.
+    def _poll_forever(self) -> None:
+        while not self._stopped.wait(self._jittered(self.interval)):
+            self.poll()
 
-        Returns:
-            str: Message indicating the process creation.
+    def stop(self) -> None:
+        """
+        Stops the polling thread.
         """
-        return f'Created process for user {user} ({name})'
+        self._stopped.set()
 
+
+# The servers, the lifecycle options and the usage bookkeeping shared with
+# the background threads are all fields of the facade.
+# pylint: disable=too-many-instance-attributes
 @dataclass
 class OperatingSystem:
     """
     The Facade class for interacting with servers.
+
+    Servers are booted and killed concurrently, wave by wave following
+    their depends_on, on up to `workers` threads.
+
+    fs and ps are only constructed (from `providers`) and booted when a
+    facade method needing them is first called, unless start() boots
+    everything up front. With an `idle_timeout`, a background thread stops
+    the servers left unused that long. With a `health_interval`, a
+    HealthMonitor restarts the servers that stop answering.
     """
-    fs: FileServer = field(default_factory=FileServer)
-    ps: ProcessServer = field(default_factory=ProcessServer)
+    fs: FileServer = None
+    ps: ProcessServer = None
+    extra: list = field(default_factory=list)
+    workers: int = 8
+    providers: dict = field(default_factory=lambda: {'fs': FileServer, 'ps': ProcessServer})
+    idle_timeout: float = None
+    health_interval: float = None
+    monitor: HealthMonitor = field(default=None, init=False, repr=False)
+    last_used: dict = field(default_factory=dict, init=False)
+    in_flight: dict = field(default_factory=dict, init=False)
+    _lock: threading.RLock = field(default_factory=threading.RLock, init=False, repr=False)
+    _stopped: threading.Event = field(default_factory=threading.Event, init=False, repr=False)
 
     def __post_init__(self) -> None:
         """
         Initialization after object creation.
         """
         print("OS Booted up!")
+        if self.idle_timeout:
+            threading.Thread(target=self._reap, name='idle-reaper', daemon=True).start()
+        if self.health_interval:
+            self.monitor = HealthMonitor(self, self.health_interval)
+            self.monitor.start()
+
+    @property
+    def booted(self) -> set:
+        """
+        Names of the servers up, whether healthy or not.
+        """
+        return {server.name for server in self._constructed() if server.state in UP_STATES}
 
-    def start(self):
+    @property
+    def servers(self) -> list:
         """
-        Start the servers.
+        All the servers behind the facade, constructing the missing ones.
         """
-        [p.boot() for p in [self.fs, self.ps]]
-    
-    def shutdown(self):
+        return [self._construct(attr) for attr in self.providers] + self.extra
+
+    def _constructed(self) -> list:
+        """
+        The servers constructed so far.
+        """
+        return [server for server in [getattr(self, attr) for attr in self.providers]
+                if server is not None] + self.extra
+
+    def _construct(self, attr):
+        """
+        Returns the server held in attr, constructing it on first use.
+        """
+        server = getattr(self, attr)
+        if server is None:
+            server = self.providers[attr]()
+            setattr(self, attr, server)
+        return server
+
+    def _find(self, name):
+        """
+        Returns the server called name, constructing servers until found.
+
+        Raises:
+            ValueError: If no server has that name.
+        """
+        for server in self._constructed():
+            if server.name == name:
+                return server
+        for attr in self.providers:
+            if getattr(self, attr) is None and self._construct(attr).name == name:
+                return getattr(self, attr)
+        raise ValueError(f'No server called {name}')
+
+    def activate(self, *attrs) -> None:
+        """
+        Boots the servers held in attrs, and what they depend on, unless
+        they already run.
+
+        Args:
+            attrs (str): Attributes holding the servers, e.g. 'fs'.
+        """
+        now = time.monotonic()
+        servers = [getattr(self, attr) for attr in attrs]
+        if any(server is None or server.state not in UP_STATES for server in servers):
+            with self._lock:
+                servers = [self._construct(attr) for attr in attrs]
+                needed, todo = {}, list(servers)
+                while todo:
+                    server = todo.pop()
+                    if server.name not in needed and server.state not in UP_STATES:
+                        needed[server.name] = server
+                        todo.extend(self._find(name) for name in server.depends_on)
+                if needed:
+                    self._run('boot', list(needed.values()))
+        for server in servers:
+            self.last_used[server.name] = now
+
+    @contextlib.contextmanager
+    def using(self, *attrs):
+        """
+        Activates the servers held in attrs and counts them in flight until
+        the block ends, so that stop_idle() leaves them running meanwhile.
+
+        Args:
+            attrs (str): Attributes holding the servers, e.g. 'fs'.
         """
-        Shutdown the servers.
+        with self._lock:
+            self.activate(*attrs)
+            names = [getattr(self, attr).name for attr in attrs]
+            for name in names:
+                self.in_flight[name] = self.in_flight.get(name, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                now = time.monotonic()
+                for name in names:
+                    self.in_flight[name] -= 1
+                    self.last_used[name] = now
+
+    def stop_idle(self, now=None) -> list:
+        """
+        Stops the running servers unused for idle_timeout seconds that no
+        other running server depends on and no facade call is using.
+
+        Args:
+            now (float): time.monotonic() value to compare with.
+
+        Returns:
+            list: Names of the stopped servers.
+        """
+        now = time.monotonic() if now is None else now
+        stopped = []
+        with self._lock:
+            while True:
+                running = [server for server in self._constructed()
+                           if server.name in self.booted]
+                required = {name for server in running for name in server.depends_on}
+                idle = [server for server in running if server.name not in required
+                        and not self.in_flight.get(server.name)
+                        and now - self.last_used.get(server.name, now) >= self.idle_timeout]
+                if not idle:
+                    return stopped
+                self._run('kill', idle, restart=False)
+                stopped.extend(server.name for server in idle)
+
+    def _reap(self) -> None:
         """
-        [p.kill() for p in [self.fs, self.ps]]
-    
-    def restart(self):
+        Body of the idle reaper thread.
+        """
+        while not self._stopped.wait(self.idle_timeout / 2):
+            self.stop_idle()
+
+    def _run(self, action, servers, reverse=False, **kwargs) -> LifecycleReport:
         """
-        Restart the servers.
+        Calls the action method of the servers, wave by wave, the servers
+        of a wave in parallel, and times each call.
         """
-        [p.kill(restart=True) for p in [self.fs, self.ps]]
+        timings = {}
 
+        def timed(server):
+            begin = time.perf_counter()
+            getattr(server, action)(**kwargs)
+            timings[server.name] = time.perf_counter() - begin
+
+        ready = (self.booted if action == 'boot'
+                 else {server.name for server in self._constructed()})
+        waves = dependency_waves(servers, reverse, ready)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(self.workers) as pool:
+            for wave in waves:
+                # list() waits for the wave and re-raises a failed call
+                list(pool.map(timed, wave))
+        wall = time.perf_counter() - start
+        if action == 'boot' or kwargs.get('restart'):
+            self.last_used.update(dict.fromkeys([server.name for server in servers],
+                                                time.monotonic()))
+        return LifecycleReport(action, [[server.name for server in wave] for wave in waves],
+                               timings, wall)
+
+    def start(self) -> LifecycleReport:
+        """
+        Start all the servers not running yet, dependencies first.
+        """
+        with self._lock:
+            return self._run('boot', [server for server in self.servers
+                                      if server.name not in self.booted])
+
+    def shutdown(self) -> LifecycleReport:
+        """
+        Shutdown the running servers, dependents first, and the background
+        threads.
+        """
+        self._stopped.set()
+        if self.monitor:
+            self.monitor.stop()
+        with self._lock:
+            return self._run('kill', [server for server in self._constructed()
+                                      if server.state in UP_STATES],
+                             reverse=True, restart=False)
+
+    def restart(self) -> LifecycleReport:
+        """
+        Restart the servers: kill them all, dependents first, then boot them
+        all, dependencies first, so no server comes back up while what it
+        depends on is still down.
+
+        Returns:
+            LifecycleReport: The kill waves followed by the boot waves, with
+            the kill and boot time of every server added up.
+        """
+        with self._lock:
+            servers = self.servers
+            down = self._run('kill', servers, reverse=True, restart=True, reboot=False)
+            up = self._run('boot', servers)
+        timings = {name: down.timings[name] + up.timings[name] for name in up.timings}
+        return LifecycleReport('restart', down.waves + up.waves, timings, down.wall + up.wall)
+
+    def metrics(self) -> dict:
+        """
+        Lifecycle metrics: state, restart count and transition latencies
+        (count, mean and max seconds) of every server, and the health
+        monitor counters.
+        """
+        servers = {
+            server.name: {
+                'state': server.state.name,
+                'restarts': server.restarts,
+                'transitions': {key: {'count': count, 'mean': total / count, 'max': top}
+                                for key, (count, total, top) in server.latencies.items()},
+            }
+            for server in self._constructed()}
+        monitor = self.monitor and {'polls': self.monitor.polls, 'zombies': self.monitor.zombies,
+                                    'failing': dict(self.monitor.failures),
+                                    'errors': {name: repr(error) for name, error
+                                               in self.monitor.errors.items()}}
+        return {'servers': servers, 'monitor': monitor}
+
+    @needs('fs')
     def create_file(self, user, name, permission):
         """
         Create a file using the FileServer.
@@ -144,27 +457,247 @@ class OperatingSystem:
         """
         return self.fs.create_file(user, name, permission)
 
-    def create_process(self, user, name):
+    @needs('ps')
+    def create_process(self, user, name, target=None, args=(), timeout=None):
         """
         Create a process using the ProcessServer.
 
         Args:
             user (str): User for whom the process is created.
             name (str): Name of the process.
+            target (str): 'module:function' to run on the worker pool.
+            args (tuple): Arguments of target.
+            timeout (float): Seconds the task may take.
+
+        Returns:
+            str: Message indicating the process creation, or the TaskResult
+            of target when one is given.
+        """
+        return self.ps.create_process(user, name, target, args, timeout)
+
+    @needs('fs')
+    def create_files(self, batch) -> BatchResult:
+        """
+        Create a batch of files using the FileServer, in one call.
+
+        Args:
+            batch (iterable): (user, name, permission) tuples.
+
+        Returns:
+            BatchResult: The FileRecords created and the rejected positions.
+        """
+        return self.fs.create_files(batch)
+
+    @needs('fs')
+    def write_file(self, user, name, data, offset=None):
+        """
+        Write to a file using the FileServer, appending by default.
+        """
+        return self.fs.write_file(user, name, data, offset)
+
+    @needs('fs')
+    def read_file(self, user, name, size=-1, offset=0):
+        """
+        Read a file using the FileServer.
+        """
+        return self.fs.read_file(user, name, size, offset)
+
+    @needs('fs')
+    def list_files(self, user):
+        """
+        List a user's files using the FileServer.
+        """
+        return self.fs.list_files(user)
+
+    @needs('fs')
+    def delete_file(self, user, name):
+        """
+        Delete a file using the FileServer.
+        """
+        return self.fs.delete_file(user, name)
+
+    @needs('ps')
+    def create_processes(self, batch) -> BatchResult:
+        """
+        Create a batch of processes using the ProcessServer, in one call.
+
+        Args:
+            batch (iterable): (user, name) tuples.
 
         Returns:
-            str: Message indicating the process creation.
+            BatchResult: The ProcessRecords created and the rejected positions.
         """
-        return self.ps.create_process(user, name)
-        
+        return self.ps.create_processes(batch)
+
+
+def benchmark_boot(count: int = 20, delay: float = 0.05) -> None:
+    """
+    Boots `count` servers taking `delay` seconds each, half of them
+    depending on the FileServer, serially and through the facade.
+
+    Args:
+        count (int): Number of extra servers.
+        delay (float): Seconds each boot takes.
+    """
+    extra = [ProcessServer(f'Worker{number}', depends_on=('FileServer',) if number % 2 else (),
+                           delay=delay) for number in range(count)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        system = OperatingSystem(FileServer(delay=delay), ProcessServer(delay=delay), extra)
+        start = time.perf_counter()
+        for server in system.servers:
+            server.boot()
+        serial = time.perf_counter() - start
+        system.shutdown()
+        report = system.start()
+    print(f'{len(system.servers)} servers, serial boot {serial:.2f}s, '
+          f'{len(report.waves)} waves in {report.wall:.2f}s')
+
+
+def benchmark_cold_start(delay: float = 0.05) -> None:
+    """
+    Times a CLI-like run creating one file, booting everything up front
+    and lazily, with servers taking `delay` seconds to boot.
+
+    Args:
+        delay (float): Seconds each boot takes.
+    """
+    providers = {'fs': lambda: FileServer(delay=delay),
+                 'ps': lambda: ProcessServer(delay=delay)}
+    extra = [ProcessServer(f'Worker{number}', delay=delay) for number in range(10)]
+    timings = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for mode in ('eager', 'lazy'):
+            start = time.perf_counter()
+            system = OperatingSystem(providers=providers, extra=list(extra))
+            if mode == 'eager':
+                system.start()
+            system.create_file("Amitabh", "hello-world.txt", "r r-w")
+            timings[mode] = time.perf_counter() - start
+    print(f'cold start to first create_file : eager {timings["eager"]:.2f}s, '
+          f'lazy {timings["lazy"]:.2f}s')
+
+
+def benchmark_batches(count: int = 200000) -> None:
+    """
+    Creates `count` files one create_file call at a time, then in a single
+    create_files batch.
+
+    Args:
+        count (int): Number of files.
+    """
+    batch = [("Amitabh", f"file{number}.txt", "r r-w") for number in range(count)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        system = OperatingSystem()
+        system.start()
+    start = time.perf_counter()
+    for user, name, permission in batch:
+        system.create_file(user, name, permission)
+    single = time.perf_counter() - start
+    start = time.perf_counter()
+    result = system.create_files(batch)
+    batched = time.perf_counter() - start
+    print(f'{count} files : create_file {single:.2f}s, create_files {batched:.2f}s '
+          f'({len(result.records)} records, {len(result.errors)} errors)')
+
+
+def benchmark_file_server(files: int = 1000, reads: int = 20000) -> None:
+    """
+    Compares the FileServer pooled reads, cached stats and scandir listing
+    with plain open/read/close, os.stat and listdir + stat.
+
+    Args:
+        files (int): Number of files created.
+        reads (int): Number of reads and stats, mostly on a few hot files.
+    """
+    with tempfile.TemporaryDirectory() as root:
+        server = FileServer(root=root)
+        server.create_files(("Amitabh", f"file{number}.txt", "rw r r") for number in range(files))
+        for number in range(files):
+            server.write_file("Amitabh", f"file{number}.txt", "HeyAmitabh" * 10)
+        picks = [f"file{int(random.paretovariate(1.2)) % files}.txt" for _ in range(reads)]
+        folder = server.path("Amitabh")
+
+        def timed(function):
+            start = time.perf_counter()
+            function()
+            return time.perf_counter() - start
+
+        def plain_reads():
+            for name in picks:
+                with open(os.path.join(folder, name), 'rb') as file:
+                    file.read()
+
+        pooled = timed(lambda: [server.read_file("Amitabh", name) for name in picks])
+        plain = timed(plain_reads)
+        cached = timed(lambda: [server.stat_file("Amitabh", name) for name in picks])
+        stats = timed(lambda: [os.stat(os.path.join(folder, name)) for name in picks])
+        scanned = timed(lambda: [server.list_files("Amitabh") for _ in range(20)]) / 20
+        listed = timed(lambda: [sorted(
+            FileInfo(name, stat.st_size, stat.st_mtime, stat.st_mode & 0o777)
+            for name, stat in ((name, os.stat(os.path.join(folder, name)))
+                               for name in os.listdir(folder))) for _ in range(20)]) / 20
+    print(f'{reads} reads : pooled {pooled * 1e6 / reads:.1f}us, open/read/close '
+          f'{plain * 1e6 / reads:.1f}us ({server.descriptors.hits} pool hits)')
+    print(f'{reads} stats : cached {cached * 1e6 / reads:.2f}us, '
+          f'os.stat {stats * 1e6 / reads:.2f}us')
+    print(f'{files} files listing : scandir {scanned * 1e3:.1f}ms, '
+          f'listdir + stat {listed * 1e3:.1f}ms')
+
+
+def benchmark_worker_pool(tasks: int = 100, size: int = 4) -> None:
+    """
+    Runs `tasks` short tasks on a pool of `size` pre-started workers, then
+    spawning a fresh worker for each one.
+
+    Args:
+        tasks (int): Number of tasks.
+        size (int): Number of pool workers.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        server = ProcessServer(pool_size=size)
+        server.boot()
+    server.create_process("Amitabh", "warmup", "os:getpid")
+    start = time.perf_counter()
+    futures = [server.submit("Amitabh", f"task{number}", "math:factorial", (number,))
+               for number in range(tasks)]
+    workers = {future.result().worker for future in futures}
+    pooled = time.perf_counter() - start
+    with contextlib.redirect_stdout(io.StringIO()):
+        server.kill(restart=False)
+    task = json.dumps({'target': 'math:factorial', 'args': [10]}) + '\n'
+    start = time.perf_counter()
+    for _ in range(tasks):
+        subprocess.run([sys.executable, '-c', WORKER_SOURCE], input=task, text=True,
+                       capture_output=True, check=True)
+    spawned = time.perf_counter() - start
+    print(f'{tasks} tasks : pooled {pooled * 1e3 / tasks:.2f}ms each on {len(workers)} workers, '
+          f'spawned {spawned * 1e3 / tasks:.2f}ms each')
+
 
 def main() -> None:
-    os = OperatingSystem()
-    os.start()
-    os.create_file("Amitabh", "hello-world.txt", "r r-w")
-    os.create_process("Amitabh", "calm")
-    os.shutdown()
-    os.restart()
+    system = OperatingSystem()
+    system.start()
+    system.create_file("Amitabh", "hello-world.txt", "r r-w")
+    system.create_process("Amitabh", "calm")
+    system.shutdown()
+    report = system.restart()
+    print(report.waves, report.action, f'{report.wall:.4f}s')
+
+    cli = OperatingSystem()
+    print(cli.create_file("Amitabh", "hello-world.txt", "r r-w"), cli.booted)
+
+    watched = OperatingSystem(health_interval=60)
+    watched.create_process("Amitabh", "calm")
+    watched.ps.crash()
+    restarted = watched.monitor.poll()
+    metrics = watched.metrics()['servers']['ProcessServer']
+    print(restarted, watched.ps.state, metrics['restarts'], list(metrics['transitions']))
+    watched.shutdown()
+    benchmark_boot()
+    benchmark_cold_start()
+    benchmark_batches()
+    benchmark_file_server()
+    benchmark_worker_pool()
 
 if __name__ == '__main__':
     main()
@@ -173,12 +706,29 @@ OUTPUT = r"""
 OS Booted up!
 FileServer booted up!
 ProcessServer booted up!
+ProcessServer killed!
 FileServer killed!
-FileServer restarted!
 ProcessServer killed!
-ProcessServer restarted!
 FileServer killed!
-FileServer restarted!
+FileServer booted up!
+ProcessServer booted up!
+[['ProcessServer'], ['FileServer'], ['FileServer'], ['ProcessServer']] restart 0.0007s
+OS Booted up!
+FileServer booted up!
+Created file for user Amitabh (hello-world.txt with permissions: r r-w) {'FileServer'}
+OS Booted up!
+FileServer booted up!
+ProcessServer booted up!
 ProcessServer killed!
 ProcessServer restarted!
+['ProcessServer'] State.running 1 ['new->running', 'running->zombie', 'zombie->restart', 'restart->running']
+ProcessServer killed!
+FileServer killed!
+22 servers, serial boot 1.11s, 2 waves in 0.20s
+cold start to first create_file : eager 0.15s, lazy 0.05s
+200000 files : create_file 0.40s, create_files 0.23s (200000 records, 0 errors)
+20000 reads : pooled 3.1us, open/read/close 7.8us (19739 pool hits)
+20000 stats : cached 0.78us, os.stat 4.39us
+1000 files listing : scandir 6.0ms, listdir + stat 5.7ms
+100 tasks : pooled 0.18ms each on 4 workers, spawned 31.89ms each
 """
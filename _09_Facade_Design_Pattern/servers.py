@@ -0,0 +1,833 @@
+"""
+FACADE SUBSYSTEMS
+=================
+
+The servers hidden behind the OperatingSystem facade of facade.py: their
+lifecycle state machine, the FileServer with its descriptor pool and stat
+cache, and the ProcessServer with its pool of worker subprocesses. Clients
+are not meant to use them directly, that is what the facade is for.
+
+"""
+
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any
+import abc
+import contextlib
+import functools
+import itertools
+import json
+import os
+import queue
+import re
+import subprocess
+import sys
+import threading
+import time
+from abc import ABCMeta
+
+State = Enum("State", "new running sleeping restart zombie")
+
+# The states a server may go to from each state
+TRANSITIONS = {
+    State.new: {State.running, State.restart},
+    State.running: {State.sleeping, State.restart, State.zombie},
+    State.sleeping: {State.running, State.restart},
+    State.restart: {State.running, State.zombie},
+    State.zombie: {State.restart, State.sleeping},
+}
+# States in which a server holds resources and must be killed
+UP_STATES = {State.running, State.restart, State.zombie}
+
+# Up to three space separated groups (user, group, others) like 'r r-w'
+PERMISSION = re.compile(r'[rwx-]{1,3}(?: [rwx-]{1,3}){0,2}')
+FileRecord = namedtuple('FileRecord', 'id user name permission')
+ProcessRecord = namedtuple('ProcessRecord', 'pid user name')
+# records: what was created, errors: (position in the batch, reason) pairs
+BatchResult = namedtuple('BatchResult', 'records errors')
+FileInfo = namedtuple('FileInfo', 'name size mtime mode')
+
+
+@functools.lru_cache(maxsize=256)
+def permission_mode(permission: str) -> int:
+    """
+    Converts a permission like 'r r-w' to a file mode like 0o460: the groups
+    are for the user, the group and the others, missing ones grant nothing.
+    Results are cached, so each distinct valid permission is parsed once.
+
+    Raises:
+        ValueError: If the permission does not match PERMISSION.
+    """
+    if not PERMISSION.fullmatch(permission):
+        raise ValueError(f'invalid permission {permission!r}')
+    mode = 0
+    for shift, group in zip((6, 3, 0), permission.split()):
+        mode |= sum(bit for char, bit in (('r', 4), ('w', 2), ('x', 1)) if char in group) << shift
+    return mode
+
+
+class LRUCache:
+    """
+    A mapping bounded to `capacity` entries, dropping the least recently
+    used ones and calling on_evict(key, value) for each of them.
+
+    Args:
+        capacity (int): Maximum number of entries.
+        on_evict (callable): Called with every entry dropped or popped.
+    """
+
+    def __init__(self, capacity: int, on_evict=None) -> None:
+        self.capacity = capacity
+        self.on_evict = on_evict
+        self.items = OrderedDict()
+        self.lock = threading.RLock()
+        self.hits = self.misses = 0
+
+    def get(self, key, load):
+        """
+        Returns the value of key, calling load(key) to get it on a miss.
+        """
+        with self.lock:
+            try:
+                value = self.items[key]
+            except KeyError:
+                self.misses += 1
+                return self.put(key, load(key))
+            self.hits += 1
+            self.items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        """
+        Stores value under key, evicting the oldest entry if over capacity.
+        """
+        with self.lock:
+            self.pop(key)
+            self.items[key] = value
+            self._trim()
+            return value
+
+    def update(self, pairs) -> None:
+        """
+        Stores many (key, value) pairs, taking the lock once.
+        """
+        with self.lock:
+            items = self.items
+            for key, value in pairs:
+                if key in items:
+                    self.pop(key)
+                items[key] = value
+            self._trim()
+
+    def _trim(self) -> None:
+        while len(self.items) > self.capacity:
+            old_key, old_value = self.items.popitem(last=False)
+            if self.on_evict:
+                self.on_evict(old_key, old_value)
+
+    def pop(self, key) -> None:
+        """
+        Drops key if present.
+        """
+        with self.lock:
+            if key in self.items and self.on_evict:
+                self.on_evict(key, self.items[key])
+            self.items.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Drops every entry.
+        """
+        with self.lock:
+            for key in list(self.items):
+                self.pop(key)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+@dataclass
+class Lifecycle:
+    """
+    Lifecycle metrics of a server: the restart count, when it entered its
+    state, the last transitions and, per kind of transition, its count,
+    total and max seconds.
+    """
+    restarts: int = 0
+    since: float = field(default_factory=time.monotonic)
+    history: deque = field(default_factory=lambda: deque(maxlen=32))
+    latencies: dict = field(default_factory=dict)
+
+    def record(self, old, new, began=None) -> None:
+        """
+        Records a change from state old to state new.
+
+        Args:
+            old (State): The state left.
+            new (State): The state entered.
+            began (float): time.monotonic() when the change was asked for,
+                to measure how long it took. Now by default.
+        """
+        now = time.monotonic()
+        # count, total and max seconds
+        stats = self.latencies.setdefault(f'{old.name}->{new.name}', [0, 0.0, 0.0])
+        took = now - (now if began is None else began)
+        stats[0] += 1
+        stats[1] += took
+        stats[2] = max(stats[2], took)
+        self.history.append((old, new, time.time()))
+        if new is State.restart:
+            self.restarts += 1
+        self.since = now
+
+
+@dataclass
+class Server(metaclass=ABCMeta):
+    """
+    Abstract base class for servers.
+
+    boot() and kill() drive the state machine, taking `delay` seconds each,
+    and call the start_up() and shut_down() of the subclass to acquire and
+    release its resources. Every state change goes through transition(). It
+    checks the change against TRANSITIONS and records it in `lifecycle`.
+    `alive` is what health checks look at: a crashed server is still
+    running as far as its state goes, until a poller notices.
+    """
+    alive: bool = field(default=True, init=False, repr=False)
+    lifecycle: Lifecycle = field(default_factory=Lifecycle, init=False, repr=False)
+    name: str = 'Server'
+    state: Enum = State.new
+    depends_on: tuple = ()
+    delay: float = 0.0
+
+    @property
+    def restarts(self) -> int:
+        """
+        Number of times the server went to State.restart.
+        """
+        return self.lifecycle.restarts
+
+    @property
+    def since(self) -> float:
+        """
+        time.monotonic() when the server entered its state.
+        """
+        return self.lifecycle.since
+
+    @property
+    def history(self) -> deque:
+        """
+        The last (old state, new state, time.time()) transitions.
+        """
+        return self.lifecycle.history
+
+    @property
+    def latencies(self) -> dict:
+        """
+        [count, total, max] seconds of every kind of transition, by
+        'old->new' key.
+        """
+        return self.lifecycle.latencies
+
+    def transition(self, state, began=None) -> None:
+        """
+        Moves the server to state.
+
+        Args:
+            state (State): The new state.
+            began (float): time.monotonic() when the change was asked for,
+                to measure how long it took. Now by default.
+
+        Raises:
+            ValueError: If the server cannot go to state from its state.
+        """
+        self._check(state)
+        self.lifecycle.record(self.state, state, began)
+        self.state = state
+
+    def _check(self, state) -> None:
+        """
+        Raises ValueError if the server cannot go to state from its state.
+        """
+        if state not in TRANSITIONS[self.state]:
+            raise ValueError(f'{self.name} cannot go from {self.state.name} to {state.name}')
+
+    def healthy(self) -> bool:
+        """
+        Health check of the server.
+        """
+        return self.alive
+
+    def crash(self) -> None:
+        """
+        Makes the server stop answering, as a hung process would.
+        """
+        self.alive = False
+
+    def boot(self):
+        """
+        Boots the server, from State.new, sleeping or restart.
+        """
+        self._check(State.running)
+        began = time.monotonic()
+        time.sleep(self.delay)
+        self.start_up()
+        self.alive = True
+        print(f'{self.name} booted up!')
+        self.transition(State.running, began)
+
+    def kill(self, restart=True, reboot=True):
+        """
+        Kills the server.
+
+        Args:
+            restart (bool): Go through State.restart rather than to sleep.
+            reboot (bool): When restarting, come back up right away. Without
+                it the server waits in State.restart for boot().
+        """
+        began = time.monotonic()
+        if restart:
+            self.transition(State.restart)
+        else:
+            self._check(State.sleeping)
+        time.sleep(self.delay)
+        self.shut_down()
+        print(f'{self.name} killed!')
+        if not restart:
+            self.transition(State.sleeping, began)
+        elif reboot:
+            self.start_up()
+            self.alive = True
+            print(f'{self.name} restarted!')
+            self.transition(State.running, began)
+
+    @abc.abstractmethod
+    def start_up(self) -> None:
+        """
+        Abstract method acquiring what the server needs to run.
+        """
+
+    @abc.abstractmethod
+    def shut_down(self) -> None:
+        """
+        Abstract method releasing what start_up() and the calls acquired.
+        """
+
+# Each attribute is a knob or a cache of its own: root, pool and cache
+# sizes, the id counter, descriptors, stats, folders and paths.
+# pylint: disable=too-many-instance-attributes
+@dataclass
+class FileServer(Server):
+    """
+    Concrete implementation of FileServer server.
+
+    With a `root` folder, files are really created, as root/user/name. Up
+    to `max_open` descriptors are kept open in an LRU pool so repeated
+    reads and writes skip open() and close(), and up to `max_stats` stat
+    results are cached until the file changes through the server. Changes
+    made behind its back are only seen by read_file(), which sizes files
+    with fstat on the pooled descriptor, and by list_files(). Without a
+    root, only the records and messages are produced.
+    """
+    name: str = 'FileServer'
+    root: str = None
+    max_open: int = 64
+    max_stats: int = 4096
+    ids: Any = field(default_factory=lambda: itertools.count(1), init=False, repr=False)
+    descriptors: LRUCache = field(default=None, init=False, repr=False)
+    stats: LRUCache = field(default=None, init=False, repr=False)
+    folders: set = field(default_factory=set, init=False, repr=False)
+    paths: dict = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        # Descriptors are keyed by (path, flags) and closed when evicted
+        self.descriptors = LRUCache(self.max_open, lambda key, fd: os.close(fd))
+        self.stats = LRUCache(self.max_stats)
+
+    def start_up(self) -> None:
+        """
+        Nothing to acquire, descriptors are opened on first use.
+        """
+
+    def shut_down(self) -> None:
+        """
+        Closes the pooled descriptors and forgets the cached stats.
+        """
+        self.descriptors.clear()
+        self.stats.clear()
+        self.folders.clear()
+        self.paths.clear()
+
+    def path(self, user, name=None) -> str:
+        """
+        Returns the path of a user's folder, or of one of their files.
+
+        Raises:
+            ValueError: If the server has no root, or user or name are not
+                plain file names.
+        """
+        try:
+            return self.paths[user, name]
+        except KeyError:
+            pass
+        if self.root is None:
+            raise ValueError(f'{self.name} has no root folder')
+        for part in (user, name) if name is not None else (user,):
+            if not part or part in ('.', '..') or os.sep in part or '\0' in part:
+                raise ValueError(f'Invalid file name {part!r}')
+        folder = os.path.join(self.root, user)
+        if len(self.paths) >= self.max_stats:
+            self.paths.clear()
+        path = self.paths[user, name] = folder if name is None else os.path.join(folder, name)
+        return path
+
+    def _create(self, user, name, mode) -> None:
+        path = self.path(user, name)
+        if user not in self.folders:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.folders.add(user)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            os.fchmod(fd, mode)
+        finally:
+            os.close(fd)
+        self.stats.pop(path)
+
+    @staticmethod
+    def _mode(name, permission) -> int:
+        """
+        Checks a file name and permission the same way for create_file()
+        and create_files(), and returns the file mode.
+
+        Raises:
+            ValueError: If the name is empty or the permission invalid.
+        """
+        if not name:
+            raise ValueError('empty file name')
+        return permission_mode(permission)
+
+    def create_file(self, user, name, permission):
+        """
+        Create a file for a user with the specified name and permission.
+
+        Without a root folder nothing is written to disk.
+
+        Args:
+            user (str): User for whom the file is created.
+            name (str): Name of the file.
+            permission (str): Permission of the file.
+
+        Returns:
+            str: Message indicating the file creation.
+
+        Raises:
+            ValueError: If the permission or the names are invalid.
+        """
+        mode = self._mode(name, permission)
+        if self.root is not None:
+            self._create(user, name, mode)
+        return f'Created file for user {user} ({name} with permissions: {permission})'
+
+    def _descriptor(self, path, flags) -> int:
+        """
+        Returns a pooled descriptor of path opened with flags. The caller
+        must hold descriptors.lock while using it, so that it is not closed
+        under its feet by an eviction.
+        """
+        return self.descriptors.get((path, flags), lambda key: os.open(*key))
+
+    def write_file(self, user, name, data, offset=None) -> int:
+        """
+        Writes data (str or bytes) to a file, appending it by default.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        path = self.path(user, name)
+        data = data.encode() if isinstance(data, str) else data
+        with self.descriptors.lock:
+            if offset is None:
+                written = os.write(self._descriptor(path, os.O_WRONLY | os.O_APPEND), data)
+            else:
+                written = os.pwrite(self._descriptor(path, os.O_WRONLY), data, offset)
+        self.stats.pop(path)
+        return written
+
+    def read_file(self, user, name, size=-1, offset=0) -> bytes:
+        """
+        Reads size bytes (the whole file by default) from offset. The size
+        of the whole file comes from the open descriptor, not the stat
+        cache, so that other writers are not cut off.
+        """
+        path = self.path(user, name)
+        with self.descriptors.lock:
+            fd = self._descriptor(path, os.O_RDONLY)
+            if size < 0:
+                size = max(0, os.fstat(fd).st_size - offset)
+            return os.pread(fd, size, offset)
+
+    def stat_file(self, user, name) -> os.stat_result:
+        """
+        Returns the metadata of a file, from the cache when possible. The
+        cache only follows changes made through this server, the server
+        is meant to be the only writer of its files.
+        """
+        return self.stats.get(self.path(user, name), os.stat)
+
+    def list_files(self, user) -> list:
+        """
+        Lists a user's files in one scandir pass, refreshing the metadata
+        cache on the way.
+
+        Returns:
+            list: A FileInfo per file, sorted by name.
+        """
+        with os.scandir(self.path(user)) as entries:
+            found = [(entry.path, entry.name, entry.stat(follow_symlinks=False))
+                     for entry in entries if entry.is_file(follow_symlinks=False)]
+        self.stats.update((path, stat) for path, _, stat in found)
+        return sorted(FileInfo(name, stat.st_size, stat.st_mtime, stat.st_mode & 0o777)
+                      for _, name, stat in found)
+
+    def delete_file(self, user, name) -> None:
+        """
+        Deletes a file, closing its pooled descriptors.
+        """
+        path = self.path(user, name)
+        with self.descriptors.lock:
+            for flags in (os.O_RDONLY, os.O_WRONLY, os.O_WRONLY | os.O_APPEND):
+                self.descriptors.pop((path, flags))
+            os.unlink(path)
+        self.stats.pop(path)
+
+    def create_files(self, batch) -> BatchResult:
+        """
+        Create many files in one call, checked like create_file(). Each
+        distinct permission is parsed once, however many files use it.
+
+        Args:
+            batch (iterable): (user, name, permission) tuples.
+
+        Returns:
+            BatchResult: A FileRecord per file created, and the position and
+            reason of every rejected one.
+        """
+        records, errors = [], []
+        ids = self.ids
+        on_disk = self.root is not None
+        for position, (user, name, permission) in enumerate(batch):
+            try:
+                mode = self._mode(name, permission)
+                if on_disk:
+                    self._create(user, name, mode)
+            except (OSError, ValueError) as error:
+                errors.append((position, str(error)))
+                continue
+            records.append(FileRecord(next(ids), user, name, permission))
+        return BatchResult(records, errors)
+
+
+# Run by every pool worker: one JSON task per stdin line, one reply per line
+# on a private copy of stdout. The task's own prints go to stderr, so they
+# cannot be mistaken for replies.
+WORKER_SOURCE = r'''
+import importlib, json, os, sys
+replies = os.fdopen(os.dup(1), "w")
+os.dup2(2, 1)
+sys.stdout = sys.stderr
+for line in sys.stdin:
+    task = json.loads(line)
+    module, _, name = task["target"].partition(":")
+    try:
+        reply = {"value": getattr(importlib.import_module(module), name)(*task["args"])}
+    except Exception as error:
+        reply = {"error": f"{type(error).__name__}: {error}"}
+    replies.write(json.dumps(reply, default=repr) + "\n")
+    replies.flush()
+'''
+TaskResult = namedtuple('TaskResult', 'pid user name worker value seconds')
+
+
+# One attribute per concern: tasks, workers and their replies, the counters
+# and their lock, the submit lock and the closing flags.
+# pylint: disable=too-many-instance-attributes
+class WorkerPool:
+    """
+    A fixed set of pre-started Python worker subprocesses running tasks
+    given as 'module:function' targets with JSON arguments, so that short
+    tasks do not pay a fork/exec and an interpreter start each.
+
+    Every worker is fed by its own thread from one bounded queue: at most
+    `size` tasks run at once and submit() blocks when `queue_size` tasks
+    wait. The replies of a worker are read by another thread into a queue,
+    so waiting for one with a timeout works on every platform. A task
+    running past its timeout, or a worker dying or answering garbage, gets
+    the worker killed and replaced, and the task's future fails.
+
+    Args:
+        size (int): Number of worker processes.
+        queue_size (int): Maximum number of waiting tasks.
+    """
+
+    def __init__(self, size: int, queue_size: int = 256) -> None:
+        self.tasks = queue.Queue(queue_size)
+        self.workers = [None] * size
+        self.replies = [None] * size
+        for slot in range(size):
+            self._spawn(slot)
+        self.lock = threading.Lock()
+        # Orders submit()'s closing check and put against close().
+        self.submit_lock = threading.Lock()
+        self.closing = self.stopping = False
+        self.counts = dict.fromkeys(('completed', 'failed', 'timeouts', 'respawns'), 0)
+        self.threads = [threading.Thread(target=self._serve, args=(slot,),
+                                         name=f'pool-worker-{slot}', daemon=True)
+                        for slot in range(size)]
+        for thread in self.threads:
+            thread.start()
+
+    def _spawn(self, slot: int) -> None:
+        """
+        Starts the worker of a slot, and the thread reading its replies.
+        """
+        # pylint: disable=consider-using-with
+        worker = subprocess.Popen([sys.executable, '-c', WORKER_SOURCE],
+                                  stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        replies = queue.Queue()
+        threading.Thread(target=self._pump, args=(worker.stdout, replies),
+                         name=f'pool-replies-{worker.pid}', daemon=True).start()
+        self.workers[slot] = worker
+        self.replies[slot] = replies
+
+    @staticmethod
+    def _pump(stream, replies: queue.Queue) -> None:
+        """
+        Body of the thread moving the reply lines of one worker to a queue,
+        then b'' once the worker is gone.
+        """
+        with stream:
+            for line in iter(stream.readline, b''):
+                replies.put(line)
+        replies.put(b'')
+
+    def _count(self, name: str) -> None:
+        with self.lock:
+            self.counts[name] += 1
+
+    def _respawn(self, slot: int) -> None:
+        self.workers[slot].kill()
+        self.workers[slot].wait()
+        if not self.stopping:
+            self._spawn(slot)
+            self._count('respawns')
+
+    def _read_reply(self, slot: int, timeout: float) -> bytes:
+        """
+        Reads one reply line of the worker of a slot, within timeout seconds.
+
+        Raises:
+            TimeoutError: If the line is not complete in time.
+            RuntimeError: If the worker died.
+        """
+        worker = self.workers[slot]
+        try:
+            reply = self.replies[slot].get(timeout=timeout)
+        except queue.Empty:
+            self._count('timeouts')
+            raise TimeoutError(f'No reply from worker {worker.pid} within {timeout}s') from None
+        if not reply.endswith(b'\n'):
+            raise RuntimeError(f'Worker {worker.pid} died')
+        return reply
+
+    def _serve(self, slot: int) -> None:
+        """
+        Body of the thread feeding one worker.
+        """
+        while True:
+            item = self.tasks.get()
+            if item is None:
+                return
+            future, payload, timeout = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            if self.stopping:
+                future.set_exception(RuntimeError('Worker pool closed'))
+                continue
+            worker = self.workers[slot]
+            start = time.perf_counter()
+            try:
+                worker.stdin.write(payload)
+                worker.stdin.flush()
+                reply = json.loads(self._read_reply(slot, timeout))
+            except (OSError, ValueError, TimeoutError, RuntimeError) as error:
+                self._respawn(slot)
+                self._count('failed')
+                future.set_exception(error if isinstance(error, (TimeoutError, RuntimeError))
+                                     else RuntimeError(f'Worker {worker.pid} failed: {error}'))
+                continue
+            if 'error' in reply:
+                self._count('failed')
+                future.set_exception(RuntimeError(reply['error']))
+            else:
+                self._count('completed')
+                future.set_result((worker.pid, reply['value'], time.perf_counter() - start))
+
+    def submit(self, target: str, args=(), timeout: float = None) -> Future:
+        """
+        Queues a call of target ('module:function') with args.
+
+        Returns:
+            Future: Resolves to (worker pid, returned value, seconds).
+
+        Raises:
+            TypeError: If args cannot be encoded as JSON.
+            RuntimeError: If the pool is closed.
+        """
+        payload = (json.dumps({'target': target, 'args': list(args)}) + '\n').encode()
+        future = Future()
+        with self.submit_lock:
+            if self.closing:
+                raise RuntimeError('Worker pool closed')
+            self.tasks.put((future, payload, timeout))
+        return future
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Lets the queued tasks finish for up to timeout seconds, then kills
+        the workers, failing the tasks still running or waiting.
+        """
+        deadline = time.monotonic() + timeout
+        with self.submit_lock:
+            # Every task accepted so far is queued before the sentinels.
+            self.closing = True
+        try:
+            for _ in self.threads:
+                self.tasks.put(None, timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Full:
+            pass
+        for thread in self.threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        if any(thread.is_alive() for thread in self.threads):
+            self.stopping = True
+            for worker in self.workers:
+                worker.kill()
+            for thread in self.threads:
+                # the queue may have been full: make room for the sentinels
+                while thread.is_alive():
+                    with contextlib.suppress(queue.Full):
+                        self.tasks.put(None, timeout=0.1)
+                    thread.join(0.1)
+        for worker in self.workers:
+            worker.stdin.close()
+            worker.wait()
+
+
+@dataclass
+class ProcessServer(Server):
+    """
+    Concrete implementation of ProcessServer server.
+
+    With a `pool_size`, booting starts a WorkerPool of that many worker
+    subprocesses, and processes given a target run on it.
+    """
+    name: str = 'ProcessServer'
+    depends_on: tuple = ('FileServer',)
+    pool_size: int = 0
+    queue_size: int = 256
+    task_timeout: float = None
+    pids: Any = field(default_factory=lambda: itertools.count(1000), init=False, repr=False)
+    pool: WorkerPool = field(default=None, init=False, repr=False)
+
+    def start_up(self) -> None:
+        """
+        Starts the worker pool, if the server has one.
+        """
+        if self.pool_size:
+            self.pool = WorkerPool(self.pool_size, self.queue_size)
+
+    def shut_down(self) -> None:
+        """
+        Stops the worker pool.
+        """
+        if self.pool:
+            self.pool.close()
+            self.pool = None
+
+    def create_process(self, user, name, target=None, args=(), timeout=None):
+        """
+        Create a process for a user with the specified name.
+
+        Args:
+            user (str): User for whom the process is created.
+            name (str): Name of the process.
+            target (str): 'module:function' to run on the worker pool.
+            args (tuple): JSON serializable arguments of target.
+            timeout (float): Seconds the task may take, task_timeout by
+                default.
+
+        Returns:
+            str: Message indicating the process creation, or the TaskResult
+            of target when one is given.
+
+        Raises:
+            TimeoutError: If target took longer than the timeout.
+            RuntimeError: If target raised, or the server has no pool.
+        """
+        if target is None:
+            return f'Created process for user {user} ({name})'
+        return self.submit(user, name, target, args, timeout).result()
+
+    def submit(self, user, name, target, args=(), timeout=None) -> Future:
+        """
+        Runs target on the worker pool without waiting for it.
+
+        Returns:
+            Future: Resolves to the TaskResult.
+        """
+        if self.pool is None:
+            raise RuntimeError(f'{self.name} has no worker pool')
+        pid = next(self.pids)
+        done = Future()
+
+        def finish(future):
+            if future.cancelled():
+                done.cancel()
+            elif not done.set_running_or_notify_cancel():
+                return
+            elif future.exception():
+                done.set_exception(future.exception())
+            else:
+                worker, value, seconds = future.result()
+                done.set_result(TaskResult(pid, user, name, worker, value, seconds))
+
+        task = self.pool.submit(target, args,
+                                self.task_timeout if timeout is None else timeout)
+        def cancel(_):
+            # Cancelling the returned future cancels the task if it did not start.
+            if done.cancelled():
+                task.cancel()
+
+        done.add_done_callback(cancel)
+        task.add_done_callback(finish)
+        return done
+
+    def create_processes(self, batch) -> BatchResult:
+        """
+        Create many processes in one call.
+
+        Args:
+            batch (iterable): (user, name) tuples.
+
+        Returns:
+            BatchResult: A ProcessRecord per process created, and the
+            position and reason of every rejected one.
+        """
+        records, errors = [], []
+        pids = self.pids
+        for position, (user, name) in enumerate(batch):
+            if name:
+                records.append(ProcessRecord(next(pids), user, name))
+            else:
+                errors.append((position, 'empty process name'))
+        return BatchResult(records, errors)
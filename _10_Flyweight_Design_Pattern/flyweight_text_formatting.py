@@ -24,6 +24,12 @@ two classes: FormattedText and BetterFormattedText.
     and bold. The format_text method allows adding new TextRanges to the
     formatted text.
 
+    The ranges are flyweights themselves: the formatting options of a range
+    are one of the few TextStyle objects interned in STYLES, referred to by
+    a bitmask style id, and the ranges are stored as three compact arrays
+    (starts, ends and style ids). A TextRange is only a light view on one
+    slot of those arrays, so millions of ranges cost a few bytes each.
+
 Example Usage:
     # Create a FormattedText object
     text = FormattedText("Hello, World!")
@@ -51,7 +57,10 @@ Maintaining PEP 8:
 
 """
 
+from array import array
 from dataclasses import dataclass, field
+import re
+import tracemalloc
 
 
 @dataclass
@@ -101,28 +110,127 @@ class FormattedText:
         return "".join(result)
 
 
+# Bits of a style id
+CAPITALIZE, ITALIC, BOLD = 1, 2, 4
+
+
+@dataclass(frozen=True)
+class TextStyle:
+    """
+    Formatting options shared by every text range using them.
+    """
+
+    capitalize: bool = False
+    italic: bool = False
+    bold: bool = False
+
+    @property
+    def style_id(self) -> int:
+        """
+        The bitmask of the options, index of the style in STYLES.
+        """
+        return self.capitalize * CAPITALIZE | self.italic * ITALIC | self.bold * BOLD
+
+
+# The interned styles, one per combination of options, by style id
+STYLES = tuple(TextStyle(bool(style_id & CAPITALIZE), bool(style_id & ITALIC),
+                         bool(style_id & BOLD)) for style_id in range(8))
+
+
+def _style_flag(bit: int) -> property:
+    """
+    Returns a property reading and writing one bit of a TextRange style id.
+    """
+    def getter(self) -> bool:
+        return bool(self.style_id & bit)
+
+    def setter(self, value: bool) -> None:
+        self.style_id = self.style_id | bit if value else self.style_id & ~bit
+    return property(getter, setter)
+
+
+def _checked_array(typecode: str, values, name: str, stop: int = None) -> array:
+    """
+    Returns values as an array, checking they are all in [0, stop).
+
+    Raises:
+        ValueError: If a value is negative, too large for the array or not
+            below stop.
+    """
+    try:
+        checked = array(typecode, values)
+    except OverflowError:
+        raise ValueError(f'{name} out of range') from None
+    if stop is not None and checked and max(checked) >= stop:
+        raise ValueError(f'{name} must be in [0, {stop})')
+    return checked
+
+
 @dataclass
 class BetterFormattedText:
     """
     Class representing better-formatted text with support for multiple text
     ranges and customizable formatting options.
+
+    Ranges are kept in the starts, ends and style_ids arrays: 9 bytes per
+    range whatever its style.
     """
 
     plain_text: str
-    formatted_text: list = field(init=False, default_factory=list)
+    starts: array = field(init=False, default_factory=lambda: array('I'))
+    ends: array = field(init=False, default_factory=lambda: array('I'))
+    style_ids: array = field(init=False, default_factory=lambda: array('B'))
 
-    @dataclass
     class TextRange:
         """
         Class representing a specific range of text with associated formatting
-        options.
+        options. It is a view on one slot of the arrays of its text, so
+        setting its options updates the text.
         """
 
-        start: int
-        end: int
-        capitalize: bool = False
-        italic: bool = False
-        bold: bool = False
+        __slots__ = ('text', 'index')
+
+        def __init__(self, text: 'BetterFormattedText', index: int) -> None:
+            self.text = text
+            self.index = index
+
+        @property
+        def start(self) -> int:
+            """
+            Start index of the text range.
+            """
+            return self.text.starts[self.index]
+
+        @property
+        def end(self) -> int:
+            """
+            End index of the text range, included.
+            """
+            return self.text.ends[self.index]
+
+        @property
+        def style_id(self) -> int:
+            """
+            Id of the style of the range in STYLES.
+            """
+            return self.text.style_ids[self.index]
+
+        @style_id.setter
+        def style_id(self, style_id: int) -> None:
+            if not 0 <= style_id < len(STYLES):
+                raise ValueError(f'style_id must be in [0, {len(STYLES)})')
+            self.text.style_ids[self.index] = style_id
+
+        @property
+        def style(self) -> TextStyle:
+            """
+            The shared TextStyle of the range.
+            """
+            return STYLES[self.style_id]
+
+        capitalize = _style_flag(CAPITALIZE)
+        italic = _style_flag(ITALIC)
+        bold = _style_flag(BOLD)
 
         def covers(self, position: int) -> bool:
             """
@@ -137,7 +245,10 @@ class BetterFormattedText:
             """
             return self.start <= position <= self.end
 
-    def format_text(self, start: int, end: int) -> TextRange:
+        def __repr__(self) -> str:
+            return f'TextRange(start={self.start}, end={self.end}, style={self.style})'
+
+    def format_text(self, start: int, end: int, style: TextStyle = STYLES[0]) -> TextRange:
         """
         Create a new TextRange for the specified text range and add it to the
         formatted text.
@@ -145,13 +256,47 @@ class BetterFormattedText:
         Args:
             start (int): Start index of the text range.
             end (int): End index of the text range.
+            style (TextStyle): Formatting options of the range, none by
+                default.
 
         Returns:
             TextRange: The created TextRange object.
+
+        Raises:
+            ValueError: If start or end is negative.
+        """
+        if start < 0 or end < 0:
+            raise ValueError('start and end must not be negative')
+        self.starts.append(start)
+        self.ends.append(end)
+        self.style_ids.append(style.style_id)
+        return self.TextRange(self, len(self.starts) - 1)
+
+    def add_ranges(self, starts, ends, style_ids) -> None:
+        """
+        Adds many ranges at once, given as sequences of starts, ends and
+        style ids. Nothing is added unless they are all valid.
+
+        Raises:
+            ValueError: If the sequences differ in length, a start or end is
+                negative or a style id is not one of STYLES.
         """
-        text_range = self.TextRange(start, end)
-        self.formatted_text.append(text_range)
-        return text_range
+        if not len(starts) == len(ends) == len(style_ids):
+            raise ValueError('starts, ends and style_ids must have the same length')
+        starts = _checked_array('I', starts, 'starts')
+        ends = _checked_array('I', ends, 'ends')
+        style_ids = _checked_array('B', style_ids, 'style_ids', len(STYLES))
+        self.starts.extend(starts)
+        self.ends.extend(ends)
+        self.style_ids.extend(style_ids)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index: int) -> TextRange:
+        if not -len(self) <= index < len(self):
+            raise IndexError('text range index out of range')
+        return self.TextRange(self, index % len(self))
 
     def __str__(self) -> str:
         """
@@ -161,16 +306,67 @@ class BetterFormattedText:
         Returns:
             str: The formatted text.
         """
-        result = []
-        for i, char in enumerate(self.plain_text):
-            for text_range in self.formatted_text:
-                if text_range.covers(i):
-                    result.append(char.upper())
-                else:
-                    result.append(char)
+        # Mark the characters of every capitalized range, then upper case
+        # the runs of marked characters in one go each
+        marks = bytearray(len(self.plain_text))
+        for start, end, style_id in zip(self.starts, self.ends, self.style_ids):
+            if style_id & CAPITALIZE:
+                end = min(end + 1, len(marks))
+                marks[start:end] = b'\x01' * max(0, end - start)
+        result, done = [], 0
+        for run in re.finditer(b'\x01+', marks):
+            result.append(self.plain_text[done:run.start()])
+            result.append(self.plain_text[run.start():run.end()].upper())
+            done = run.end()
+        result.append(self.plain_text[done:])
         return "".join(result)
 
 
+@dataclass
+class StyledRange:
+    """
+    A text range holding its own formatting options, the way TextRange used
+    to be, kept to compare the memory used by both layouts.
+    """
+
+    start: int
+    end: int
+    capitalize: bool = False
+    italic: bool = False
+    bold: bool = False
+
+
+def benchmark_memory(ranges: int = 200000) -> None:
+    """
+    Measures the memory used by `ranges` text ranges over 4 styles, as
+    StyledRange objects and as BetterFormattedText arrays.
+
+    Args:
+        ranges (int): Number of text ranges.
+    """
+    used = {}
+    tracemalloc.start()
+    try:
+        for layout in ('objects', 'flyweight'):
+            before = tracemalloc.get_traced_memory()[0]
+            if layout == 'objects':
+                document = [StyledRange(number * 8, number * 8 + 5, capitalize=number % 2 == 0,
+                                        bold=number % 4 < 2) for number in range(ranges)]
+            else:
+                document = BetterFormattedText("")
+                document.add_ranges(range(0, ranges * 8, 8), range(5, ranges * 8, 8),
+                                    [STYLES[(number % 2 == 0) * CAPITALIZE
+                                            | (number % 4 < 2) * BOLD].style_id
+                                     for number in range(ranges)])
+            used[layout] = tracemalloc.get_traced_memory()[0] - before
+            del document
+    finally:
+        tracemalloc.stop()
+    print(f'{ranges} ranges : objects {used["objects"] / 1e6:.1f}MB '
+          f'({used["objects"] / ranges:.0f}B each), flyweight {used["flyweight"] / 1e6:.1f}MB '
+          f'({used["flyweight"] / ranges:.1f}B each)')
+
+
 def main():
     """
     The Main function.
@@ -185,6 +381,9 @@ def main():
     range_ = better_text.format_text(7, 12)
     range_.capitalize = True
     print(better_text)  # Output: "Hello, WORLD!"
+    print(range_.style is STYLES[CAPITALIZE], range_)
+
+    benchmark_memory()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,143 @@
+"""
+PyTest module to test Bridge file
+"""
+
+import os, sys
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from _06_Bridge_Design_Pattern.bridge import *
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'mmap'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        backend = InMemoryEmployeeStore()
+    elif request.param == 'sqlite':
+        backend = SqliteEmployeeStore(str(tmp_path / 'emp.db'))
+    else:
+        backend = MmapEmployeeStore(str(tmp_path / 'emp.dat'))
+    yield backend
+    backend.close()
+
+
+def test_store_get_info(store):
+    store.add(Engineer("Amitabh", "SWD", "Senior SWD"), 1000)
+    store.add(Support("Charles", "IT_2", "it"), 500)
+
+    assert len(store) == 2
+    assert StoredEmployeeInfo("Amitabh", store).get_info() == \
+        "Amitabh has a salary of USD 1000"
+    assert StoredEmployeeInfo("Charles", store, kind='role').get_info() == \
+        "Charles has a role it"
+
+
+def test_store_overwrite_and_department(store):
+    store.add(Engineer("Amitabh", "SWD", "eng"), 1000)
+    store.add(Engineer("Amitabh", "SWD", "Senior SWD"), 2000)
+    store.add(Support("Charles", "IT_2", "it"), 500)
+
+    assert len(store) == 2
+    assert store.get("Amitabh").role == "Senior SWD"
+    assert [rec.name for rec in store.by_department("SWD")] == ["Amitabh"]
+
+
+def test_store_missing_name(store):
+    with pytest.raises(KeyError):
+        store.get("Nobody")
+
+
+def test_mmap_store_reopen(tmp_path):
+    path = str(tmp_path / 'emp.dat')
+    store = MmapEmployeeStore(path)
+    store.add(Engineer("Amitabh", "SWD", "eng"), 1000)
+    store.close()
+
+    store = MmapEmployeeStore(path)
+    assert store.get("Amitabh") == EmployeeRecord("Amitabh", "SWD", "eng", 1000)
+    store.close()
+
+
+def test_mmap_store_add_many_is_all_or_nothing(tmp_path):
+    store = MmapEmployeeStore(str(tmp_path / 'emp.dat'))
+    store.add(Engineer("Amitabh", "SWD", "eng"), 1000)
+    with pytest.raises(ValueError):
+        store.add_many([(Engineer("Aadya", "SWD", "eng"), 10),
+                        (Engineer("b" * 40, "SWD", "eng"), 20)])
+    assert len(store) == 1
+    assert store.get("Amitabh").salary == 1000
+    store.add(Engineer("Aadya", "SWD", "eng"), 10)
+    assert store.get("Aadya").salary == 10
+    store.close()
+
+
+def test_salary_rollup_incremental():
+    amitabh = Engineer("Amitabh", "SWD", "eng")
+    charles = Support("Charles", "IT_2", "it")
+    dhruv = Engineer("Dhruv", "SWD", "eng")
+    rollup = SalaryRollup()
+    amitabh_salary = SalaryInfo(amitabh, 1000)
+    for info in (amitabh_salary, SalaryInfo(charles, 500),
+                 SalaryInfo(dhruv, 3000)):
+        rollup.add(info)
+
+    assert rollup.summary("SWD") == GroupSummary(2, 4000, 1000, 3000)
+
+    dhruv.department = "IT_2"
+    assert rollup.rollup() == {
+        "SWD": GroupSummary(1, 1000, 1000, 1000),
+        "IT_2": GroupSummary(2, 3500, 500, 3000),
+    }
+
+    amitabh_salary.salary = 2000
+    assert rollup.summary("SWD") == GroupSummary(1, 2000, 2000, 2000)
+
+    rollup.remove(amitabh_salary)
+    amitabh.department = "IT_2"
+    assert "SWD" not in rollup.rollup()
+    assert rollup.summary("IT_2") == GroupSummary(2, 3500, 500, 3000)
+
+
+def test_salary_rollup_by_role():
+    amitabh = Engineer("Amitabh", "SWD", "eng")
+    rollup = SalaryRollup(key='role')
+    rollup.add(SalaryInfo(amitabh, 1000))
+
+    amitabh.role = "Senior SWD"
+    assert list(rollup.rollup()) == ["Senior SWD"]
+
+
+def test_salary_rollup_compacts_stale_heap_entries():
+    amitabh = Engineer("Amitabh", "SWD", "eng")
+    rollup = SalaryRollup()
+    salary = SalaryInfo(amitabh, 0)
+    rollup.add(salary)
+    rollup.add(SalaryInfo(Engineer("Dhruv", "SWD", "eng"), 500))
+    for value in range(1, 1000):
+        salary.salary = value
+    stats = rollup._groups["SWD"]
+    assert len(stats._min_heap) <= 4 and len(stats._max_heap) <= 4
+    assert rollup.summary("SWD") == GroupSummary(2, 1499, 500, 999)
+
+
+def test_salary_rollup_needs_observed_attributes():
+    assert isinstance(vars(Employee)["department"], ObservedAttribute)
+    amitabh = Engineer("Amitabh", "SWD", "eng")
+    with pytest.raises(ValueError):
+        SalaryRollup(key='name').add(SalaryInfo(amitabh, 1000))
+    assert "_watchers" not in vars(amitabh)
+
+
+def test_salary_rollup_refuses_unobserved_employee_before_storing():
+    class Plain:
+        department = "SWD"
+
+    amitabh = Engineer("Amitabh", "SWD", "eng")
+    rollup = SalaryRollup()
+    info = SalaryInfo(amitabh, 1000)
+    rollup.add(info)
+    with pytest.raises(ValueError):
+        info.employee = Plain()
+    assert info.employee is amitabh
+    assert rollup.summary("SWD") == GroupSummary(1, 1000, 1000, 1000)
+    rollup.remove(info)
+    assert rollup.rollup() == {}
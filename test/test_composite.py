@@ -37,4 +37,342 @@ def test_eng_designation():
 
 def test_architect_designation():
     eng = Architect("Amitabh")
-    assert eng.designation == "Architect"
\ No newline at end of file
+    assert eng.designation == "Architect"
+
+def test_render_streams_lines_without_printing(capsys):
+    emp = Employee("Amitabh")
+    emp.reportees.append(Engineer("Shweta"))
+    lines = []
+    emp.render(lines.append)
+
+    assert lines == ["Amitabh (Manager)\n", " - Shweta (Engineer)\n"]
+    assert capsys.readouterr().out == ""
+
+
+def test_render_deep_hierarchy():
+    root = node = Employee("Root")
+    for i in range(5 * sys.getrecursionlimit()):
+        node.reportees.append(Engineer(f"Engineer {i}"))
+        node = node.reportees[0]
+
+    lines = str(root).splitlines()
+    assert len(lines) == 5 * sys.getrecursionlimit() + 1
+    assert lines[2] == " -  - Engineer 1 (Engineer)"
+
+
+@pytest.fixture
+def org_chart():
+    emp = Employee("Amitabh")
+    emp.reportees.append(Engineer("Shweta"))
+    emp.reportees.append(Architect("Suman"))
+    emp3 = Employee("Aadya")
+    emp3.reportees.append(Engineer("Chota Dhruv"))
+    emp3.reportees.append(Architect("Dhruv"))
+    emp.reportees.append(emp3)
+    return OrgChart(emp)
+
+
+def test_org_chart_queries(org_chart):
+    assert len(org_chart) == 6
+    assert org_chart.manager_of("Dhruv").name == "Aadya"
+    assert org_chart.manager_of("Amitabh") is None
+    assert org_chart.subtree_size("Amitabh") == 6
+    assert org_chart.subtree_size("Aadya") == 3
+    assert org_chart.reports_to("Dhruv", "Amitabh")
+    assert not org_chart.reports_to("Dhruv", "Shweta")
+    assert not org_chart.reports_to("Aadya", "Aadya")
+    assert org_chart.common_manager("Dhruv", "Chota Dhruv").name == "Aadya"
+    assert org_chart.common_manager("Dhruv", "Suman").name == "Amitabh"
+    assert org_chart.common_manager("Dhruv", "Aadya").name == "Aadya"
+
+
+def test_org_chart_add_and_move(org_chart):
+    org_chart.add_reportee("Shweta", Engineer("Dhruv Jr"))
+    assert org_chart.subtree_size("Amitabh") == 7
+    assert org_chart.reports_to("Dhruv Jr", "Amitabh")
+
+    org_chart.move("Aadya", "Dhruv Jr")
+    assert org_chart.subtree_size("Shweta") == 5
+    assert org_chart.depth("Dhruv") == 4
+    assert org_chart.common_manager("Dhruv", "Dhruv Jr").name == "Dhruv Jr"
+    assert [r.name for r in org_chart.root.reportees] == ["Shweta", "Suman"]
+
+    with pytest.raises(ValueError):
+        org_chart.move("Shweta", "Dhruv")
+    with pytest.raises(ValueError):
+        org_chart.add_reportee("Suman", Engineer("Dhruv"))
+    size = len(org_chart)
+    with pytest.raises(KeyError):
+        org_chart.add_reportee("Nobody", Engineer("x"))
+    assert "x" not in org_chart and len(org_chart) == size
+    org_chart.add_reportee("Suman", Engineer("x"))
+    assert org_chart.manager_of("x").name == "Suman"
+
+
+def test_org_chart_matches_brute_force():
+    import random
+    rng = random.Random(7)
+    root = Employee("e0")
+    chart = OrgChart(root)
+    parents = {"e0": None}
+    for i in range(1, 300):
+        manager = f"e{rng.randrange(i)}"
+        chart.add_reportee(manager, Engineer(f"e{i}"))
+        parents[f"e{i}"] = manager
+    for _ in range(50):
+        name, manager = (f"e{rng.randrange(1, 300)}" for _ in range(2))
+        if name != manager and not chart.reports_to(manager, name):
+            chart.move(name, manager)
+            parents[name] = manager
+
+    def chain(name):
+        names = []
+        while name is not None:
+            names.append(name)
+            name = parents[name]
+        return names
+
+    for _ in range(200):
+        first, second = (f"e{rng.randrange(300)}" for _ in range(2))
+        expected = next(n for n in chain(first) if n in chain(second))
+        assert chart.common_manager(first, second).name == expected
+        assert chart.reports_to(first, second) == (second in chain(first)[1:])
+    assert chart.subtree_size("e0") == 300
+
+
+def _one(_node):
+    return 1
+
+
+def _add(first, second):
+    return first + second
+
+
+def _leaf_value(node):
+    return getattr(node, "value", 0)
+
+
+def test_map_reduce_employee():
+    root = Employee("Root")
+    for i in range(20):
+        manager = Employee(f"Manager {i}")
+        manager.reportees.extend(Engineer(f"Engineer {i}.{j}") for j in range(30))
+        root.reportees.append(manager)
+
+    assert root.map_reduce(_one, _add) == 621
+    assert root.map_reduce(_one, _add, workers=2, threshold=10) == 621
+
+
+def test_map_reduce_ships_deep_subtrees():
+    root = Employee("Root")
+    boss = root
+    for i in range(3000):
+        emp = Employee(f"Chain {i}")
+        boss.reportees.append(emp)
+        boss = emp
+    root.reportees.extend(Engineer(f"Engineer {i}") for i in range(6000))
+
+    assert root.map_reduce(_one, _add) == 9001
+    assert root.map_reduce(_one, _add, workers=2, threshold=100) == 9001
+
+
+def test_map_reduce_composite_node():
+    from _07_Composite_Design_Pattern.linked_list import CompositeNode, LeafNode
+    root = CompositeNode()
+    for i in range(10):
+        composite = CompositeNode()
+        for j in range(10):
+            composite.add_node(LeafNode(i * 10 + j))
+        root.add_node(composite)
+
+    assert root.map_reduce(_leaf_value, _add) == sum(range(100))
+    assert root.map_reduce(_leaf_value, _add, workers=2, threshold=5) == \
+        sum(range(100))
+    assert LeafNode(3).map_reduce(_leaf_value, _add) == 3
+
+
+def test_packed_composite_matches_composite():
+    from _07_Composite_Design_Pattern.linked_list import (
+        CompositeNode, LeafNode, PackedCompositeNode)
+    nl, nl2 = CompositeNode(), CompositeNode()
+    for value in (1, 2):
+        nl.add_node(LeafNode(value))
+    nl2.add_node(LeafNode(3))
+    nl.add_node(nl2)
+    nl.add_node(LeafNode(5))
+
+    packed = PackedCompositeNode.from_composite(nl)
+    assert str(packed) == str(nl) == "1 --> 2 --> 3 --> 5"
+    assert [str(child) for child in packed.child_node] == ["1", "2", "3", "5"]
+    children = packed.child_node
+    assert len(children) == 4 and children[2] is packed.composites[0][1]
+    assert [children[i].value for i in (0, 1, 3, -1)] == [1, 2, 5, 5]
+    assert [str(child) for child in reversed(children)] == ["5", "3", "2", "1"]
+    with pytest.raises(IndexError):
+        children[4]
+    assert packed.map_reduce(_leaf_value, _add) == 11
+
+
+def test_packed_composite_invalidates_path():
+    from _07_Composite_Design_Pattern.linked_list import (
+        LeafNode, PackedCompositeNode)
+    root, middle, bottom = (PackedCompositeNode() for _ in range(3))
+    root.add_values([1, 2])
+    root.add_node(middle)
+    middle.add_node(bottom)
+    bottom.add_values([3, 4])
+    root.add_node(LeafNode(9))
+    assert str(root) == "1 --> 2 --> 3 --> 4 --> 9"
+
+    bottom.add_node(LeafNode(5))
+    assert str(root) == "1 --> 2 --> 3 --> 4 --> 5 --> 9"
+
+    root.remove_node(LeafNode(2))
+    bottom.remove_node(LeafNode(3))
+    assert str(root) == "1 --> 4 --> 5 --> 9"
+
+    middle.remove_node(bottom)
+    assert str(root) == "1 -->  --> 9"
+    with pytest.raises(ValueError):
+        middle.remove_node(bottom)
+
+
+def test_packed_composite_converts_or_rejects_other_nodes():
+    from _07_Composite_Design_Pattern.linked_list import (
+        CompositeNode, LeafNode, PackedCompositeNode)
+    plain = CompositeNode()
+    plain.add_nodes([LeafNode(2), LeafNode(3)])
+    packed = PackedCompositeNode()
+    packed.add_node(LeafNode(1))
+    packed.add_node(plain)
+    assert str(packed) == "1 --> 2 --> 3"
+    assert isinstance(packed.composites[0][1], PackedCompositeNode)
+    with pytest.raises(TypeError):
+        packed.add_node(4)
+    assert str(packed) == "1 --> 2 --> 3"
+
+
+def test_composite_node_child_index():
+    from _07_Composite_Design_Pattern.linked_list import CompositeNode, LeafNode
+    leaves = [LeafNode(value) for value in range(10)]
+    composite = CompositeNode()
+    composite.add_nodes(leaves)
+
+    composite.remove_nodes(leaves[1:9:2])
+    assert str(composite) == "0 --> 2 --> 4 --> 6 --> 8 --> 9"
+    assert leaves[4] in composite and leaves[3] not in composite
+    assert composite.index_of(leaves[6]) == 3
+    assert len(composite.child_node) == 6
+    assert composite.child_node[-1] is leaves[9]
+
+    composite.remove_node(leaves[0])
+    assert composite.index_of(leaves[9]) == 4
+    with pytest.raises(ValueError):
+        composite.remove_node(leaves[0])
+    with pytest.raises(ValueError):
+        composite.add_node(leaves[2])
+
+
+def test_composite_node_child_index_survives_copies():
+    import copy, pickle
+    from _07_Composite_Design_Pattern.linked_list import CompositeNode, LeafNode
+    composite = CompositeNode()
+    composite.add_nodes(LeafNode(value) for value in range(4))
+    composite.remove_node(composite.child_node[1])
+    for clone in (copy.deepcopy(composite),
+                  pickle.loads(pickle.dumps(composite))):
+        children = list(clone.child_node)
+        assert str(clone) == "0 --> 2 --> 3"
+        assert clone.index_of(children[2]) == 2
+        clone.remove_node(children[0])
+        assert str(clone) == "2 --> 3"
+    assert str(composite) == "0 --> 2 --> 3"
+
+
+def test_walk_orders_and_depth(org_chart):
+    root = org_chart.root
+    assert [e.name for e in root.walk()] == \
+        ["Amitabh", "Shweta", "Suman", "Aadya", "Chota Dhruv", "Dhruv"]
+    assert [e.name for e in root.walk(max_depth=1)] == \
+        ["Amitabh", "Shweta", "Suman", "Aadya"]
+    assert [e.name for e in root.walk(order="bfs", max_depth=0)] == ["Amitabh"]
+    assert [e.name for e in root.walk(
+        order="bfs", predicate=lambda e: isinstance(e, Architect))] == \
+        ["Suman", "Dhruv"]
+    with pytest.raises(ValueError):
+        root.walk(order="inorder")
+
+
+def test_walk_stops_early():
+    visited = []
+
+    def is_architect(emp):
+        visited.append(emp.name)
+        return isinstance(emp, Architect)
+
+    root = Employee("Root")
+    root.reportees.append(Architect("First"))
+    root.reportees.extend(Engineer(f"Engineer {i}") for i in range(1000))
+    assert next(root.walk(predicate=is_architect)).name == "First"
+    assert visited == ["Root", "First"]
+
+
+def test_walk_composite_node():
+    from _07_Composite_Design_Pattern.linked_list import CompositeNode, LeafNode
+    root, inner = CompositeNode(), CompositeNode()
+    inner.add_nodes([LeafNode(3), LeafNode(4)])
+    root.add_nodes([LeafNode(1), inner, LeafNode(2)])
+    values = lambda nodes: [getattr(node, "value", None) for node in nodes]
+
+    assert values(root.walk()) == [None, 1, None, 3, 4, 2]
+    assert values(root.walk(order="bfs")) == [None, 1, None, 2, 3, 4]
+    assert values(root.walk(predicate=lambda n: isinstance(n, LeafNode),
+                            max_depth=1)) == [1, 2]
+
+
+def test_employee_save_load(org_chart, tmp_path):
+    root = org_chart.root
+    root.reportees.append(Employee(None))
+    root.reportees[-1].designation = "Intern"
+    path = str(tmp_path / "org_chart.bin")
+    root.save(path)
+
+    loaded = Employee.load(path)
+    assert str(loaded) == str(root)
+    assert isinstance(loaded.reportees[1], Architect)
+    assert loaded.reportees[-1].name is None
+    with pytest.raises(ValueError):
+        Employee.from_bytes(b"NOPE" + bytes(20))
+
+
+def test_node_save_load(tmp_path):
+    from _07_Composite_Design_Pattern.linked_list import (
+        CompositeNode, LeafNode, Node, PackedCompositeNode)
+    root, inner = CompositeNode(), CompositeNode()
+    inner.add_nodes([LeafNode(-3), LeafNode(2 ** 40)])
+    root.add_nodes([LeafNode(1), inner, CompositeNode(), LeafNode(2)])
+    path = str(tmp_path / "node_tree.bin")
+    root.save(path)
+
+    loaded = Node.load(path)
+    assert str(loaded) == str(root)
+    assert str(Node.from_bytes(LeafNode(7).to_bytes())) == "7"
+    packed = PackedCompositeNode.from_composite(root)
+    assert str(Node.from_bytes(packed.to_bytes())) == str(root)
+
+
+def test_load_truncated_files_raises_value_error(org_chart, tmp_path):
+    from _07_Composite_Design_Pattern.linked_list import (
+        TREE_HEADER, CompositeNode, LeafNode, Node)
+    node_root = CompositeNode()
+    node_root.add_nodes([LeafNode(1), LeafNode(2)])
+    for tree, cls in ((org_chart.root, Employee), (node_root, Node)):
+        data = tree.to_bytes()
+        for size in (3, 12, len(data) // 2, len(data) - 1):
+            path = tmp_path / f"{cls.__name__}_{size}.bin"
+            path.write_bytes(data[:size])
+            with pytest.raises(ValueError):
+                cls.load(str(path))
+    with pytest.raises(ValueError):
+        Node.from_bytes(TREE_HEADER.pack(b"NODT", 1, 2, 2) + bytes([255] * 8)
+                        + bytes(16))
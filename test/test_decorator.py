@@ -0,0 +1,581 @@
+"""
+PyTest module to test the Decorator files
+"""
+
+import copy
+import io
+import os, sys
+import subprocess
+import threading
+import time
+import pytest
+from dataclasses import dataclass
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from _08_Decorator_Design_Pattern.classic_decorator import *
+
+
+@pytest.fixture(autouse=True)
+def clean_profiles():
+    PROFILES.clear()
+    yield
+    PROFILES.clear()
+
+
+def test_histogram_buckets():
+    for value in (0, 1, 31, 32, 33, 1000, 123456789, 2 ** 63 - 1):
+        floor = LatencyHistogram.bucket_floor(LatencyHistogram.bucket(value))
+        assert floor <= value
+        assert value - floor <= value / 16
+    assert LatencyHistogram.bucket(2 ** 63 - 1) < LatencyHistogram.BUCKETS
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for value in range(1, 101):
+        histogram.record(value * 1000)
+
+    summary = histogram.summary()
+    assert summary['count'] == 100
+    assert summary['mean_ns'] == 50500
+    assert 47000 <= summary['p50_ns'] <= 50000
+    assert 92000 <= summary['p99_ns'] <= 99000
+
+
+def test_profiled_threads_and_reset():
+    @profiled
+    def work(value):
+        return value * 2
+
+    threads = [threading.Thread(target=lambda: [work(i) for i in range(100)])
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert work(21) == 42
+    assert work.__name__ == 'work'
+    assert work.profile.snapshot().count == 401
+    assert len(profile_snapshots()) == 1
+
+    reset_profiles()
+    assert work.profile.snapshot().count == 0
+
+
+def test_profiled_sampling():
+    @profiled(sample_every=10)
+    def work():
+        return None
+
+    for _ in range(95):
+        work()
+    assert work.profile.snapshot().count == 9
+    for sample_every in (0, -1, 1.5):
+        with pytest.raises(ValueError):
+            profiled(sample_every=sample_every)
+
+
+def test_person_create_many():
+    people = Person.create_many([
+        ("Amitabh", "amitabh@ainebula.in", "India", 31),
+        {"name": "Aadya", "email": "aadya@ainebula.in",
+         "address": "Bangalore, India", "age": 3},
+    ])
+
+    assert [person.name for person in people] == ["Amitabh", "Aadya"]
+    assert people[1].age == 3
+    assert all(len(person.id) == 22 and person.id.startswith("PERSON")
+               for person in people)
+    assert people[0].id != people[1].id
+    assert people[0].search_string == "Amitabh India"
+    people[0].address = "Bangalore, India"
+    assert people[0].search_string == "Amitabh Bangalore, India"
+    assert copy.copy(people[1]) == people[1]
+
+
+def test_person_create_many_rejects_malformed_rows_and_runs_subclass_init():
+    with pytest.raises(ValueError):
+        Person.create_many([("Amitabh", "amitabh@ainebula.in", "India")])
+    with pytest.raises(TypeError):
+        Person.create_many([{"name": "Aadya", "email": "aadya@ainebula.in"}])
+
+    @dataclass
+    class Employee(Person):
+        def __post_init__(self):
+            super().__post_init__()
+            self.email = self.email.lower()
+
+    employee, = Employee.create_many([("Amitabh", "A@X.IN", "India", 31)])
+    assert employee.email == "a@x.in" and employee.id.startswith("EMPLOYEE")
+    assert Person("Aadya", "aadya@ainebula.in", "India", 3).id.startswith("PERSON")
+
+
+def test_person_latency_model(monkeypatch):
+    delays = []
+    monkeypatch.setattr(Person, "latency", delays.append)
+    Person.create_many([("Amitabh", "amitabh@ainebula.in", "India", 31)] * 3)
+    Person("Aadya", "aadya@ainebula.in", "India", 3)
+    assert delays == [3, 1]
+
+
+def test_person_index_search():
+    amitabh, aadya, charles = Person.create_many([
+        ("Amitabh Suman", "amitabh@ainebula.in", "Bangalore, India", 31),
+        ("Aadya", "aadya@ainebula.in", "Bangalore, India", 3),
+        ("Charles", "charles@ainebula.in", "Bangkok, Thailand", 40),
+    ])
+    index = PersonIndex([amitabh, aadya, charles])
+    try:
+        assert index.search("Bangalore") == [amitabh.id, aadya.id]
+        assert index.search("bangalore amitabh") == [amitabh.id]
+        assert index.search("Bang", prefix=True, limit=5) == \
+            [amitabh.id, aadya.id, charles.id]
+        assert index.search("Bangalore", limit=1) == [amitabh.id]
+        assert index.search("Paris") == []
+
+        aadya.address = "Paris, France"
+        assert index.search("Bangalore") == [amitabh.id]
+        assert index.search("paris") == [aadya.id]
+
+        index.remove(amitabh)
+        assert index.search("Bangalore") == []
+        amitabh.name = "Bangalore"
+        assert index.search("Bangalore") == []
+    finally:
+        index.close()
+    assert not amitabh.indexes and not aadya.indexes and not charles.indexes
+
+
+def test_person_indexes_are_owned_by_their_callers():
+    first, second = Person.create_many([
+        ("Amitabh Suman", "amitabh@ainebula.in", "Bangalore, India", 31),
+        ("Charles", "charles@ainebula.in", "Bangkok, Thailand", 40),
+    ])
+    left, right = PersonIndex([first]), PersonIndex([second])
+    assert first.indexes == (left,) and second.indexes == (right,)
+    first.address = "Paris, France"
+    assert left.search("paris") == [first.id]
+    assert right.search("paris") == []
+    left.add(first)
+    assert first.indexes == (left,)
+    right.close()
+    assert not second.indexes and right.people == {}
+
+
+def test_id_generator_threads_and_batches():
+    generator = IdGenerator(worker_id=5)
+    results = []
+    threads = [threading.Thread(
+        target=lambda: results.append(generator.next_ints(5000)))
+        for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    ids = [value for batch in results for value in batch]
+
+    assert len(set(ids)) == 20000
+    assert all(batch == sorted(batch) for batch in results)
+    assert all(IdGenerator.decode(value)[1] == 5 for value in ids)
+    later = generator.generate("Person", 3)
+    assert later == sorted(later) and later[0] > f"PERSON{max(ids):016X}"
+
+
+def test_generate_id_prefix_and_order():
+    first = generate_id("Person")
+    second, third = generate_ids("Person", 2)
+    assert first.startswith("PERSON")
+    assert first < second < third
+    assert abs(IdGenerator.decode(first)[0] - time.time() * 1000) < 60000
+
+
+def test_default_id_generator_is_created_on_first_use():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = (
+        f"import sys; sys.path.append({root!r})\n"
+        "from _08_Decorator_Design_Pattern.classic_decorator import "
+        "IdGenerator, generate_id\n"
+        "assert IdGenerator._default is None\n"
+        "generate_id('Person')\n"
+        "assert IdGenerator.default() is IdGenerator._default is not None\n"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True, timeout=30)
+
+
+def test_id_generator_workers_are_claimed_or_given():
+    first, second = IdGenerator(), IdGenerator()
+    assert first.worker_id != second.worker_id
+    assert second.worker_id != IdGenerator.default().worker_id
+    with pytest.raises(ValueError):
+        IdGenerator(worker_id=1024)
+    with pytest.raises(ValueError):
+        IdGenerator(worker_id=-1)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_id_generator_fork_gets_new_worker():
+    generator = IdGenerator()
+    fixed = IdGenerator(worker_id=5)
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            fixed.next_ints()
+            refused = 0
+        except RuntimeError:
+            refused = 1
+        fixed.worker_id = 6
+        fixed.next_ints()
+        os.write(write, f"{generator.worker_id} {refused}".encode())
+        os._exit(0)
+    os.waitpid(pid, 0)
+    worker_id, refused = map(int, os.read(read, 16).split())
+    assert worker_id not in (generator.worker_id, IdGenerator.default().worker_id)
+    assert refused == 1 and fixed.worker_id == 5
+
+
+def test_file_with_logging_binds_hot_methods(tmp_path):
+    from _08_Decorator_Design_Pattern.dynamic_decorator import FileWithLogging
+    path = tmp_path / "hello.txt"
+    path.write_text("Hey\nAmitabh\n")
+    file = FileWithLogging(open(path))
+    assert file.__dict__["read"] == file.file.read
+    assert file.read() == "Hey\nAmitabh\n"
+    file.close()
+
+
+def test_decorator_subclasses_keep_their_hot_methods(tmp_path):
+    from _08_Decorator_Design_Pattern.compressed_decorator import (
+        CompressedFileWithLogging)
+    from _08_Decorator_Design_Pattern.dynamic_decorator import (
+        BufferedFileWithLogging)
+
+    class MyBuffered(BufferedFileWithLogging):
+        pass
+
+    class MyCompressed(CompressedFileWithLogging):
+        pass
+
+    file = MyBuffered(open(tmp_path / "a.txt", "w"), flush_lines=100)
+    assert "write" not in file.__dict__
+    file.write("Hey")
+    assert file.stats.pending == 3
+    file.close()
+    with open(tmp_path / "b.bin", "wb") as raw:
+        file = MyCompressed(raw)
+        assert "write" not in file.__dict__ and "read" not in file.__dict__
+        file.write("Hey")
+        assert bytes(file.pending) == b"Hey"
+
+
+def test_buffered_file_flush_policies(tmp_path):
+    from _08_Decorator_Design_Pattern.dynamic_decorator import (
+        BufferedFileWithLogging)
+    path = tmp_path / "hello.txt"
+    reports = []
+    file = BufferedFileWithLogging(open(path, "w"), buffer_size=11,
+                                   flush_lines=3, report_interval=0,
+                                   report=reports.append)
+    file.write("Hey")
+    file.write("Amitabh")
+    assert file.stats.flushes == 0 and file.stats.pending == 10
+    file.writelines(["!"])
+    assert file.stats.flushes == 1 and file.stats.pending == 0
+
+    file.write("0123456789A")
+    assert file.stats.flushes == 2
+    file.write("tail")
+    file.close()
+    assert path.read_text() == "HeyAmitabh!0123456789Atail"
+    assert reports == []
+
+
+def test_buffered_file_reports_in_background(tmp_path):
+    from _08_Decorator_Design_Pattern.dynamic_decorator import (
+        BufferedFileWithLogging)
+    path = tmp_path / "hello.txt"
+    reports = []
+    with BufferedFileWithLogging(open(path, "w"), flush_interval=0.01,
+                                 report_interval=0.01,
+                                 report=reports.append) as file:
+        file.writelines(["Hey", "Amitabh"])
+        deadline = time.monotonic() + 5
+        while not reports and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert path.read_text() == "HeyAmitabh"
+    assert reports == ["Wrote 1 lines (10 chars in 1 calls, 1 flushes)"]
+
+
+def test_buffered_file_counts_lines_and_raises_background_errors(tmp_path):
+    from _08_Decorator_Design_Pattern.dynamic_decorator import (
+        BufferedFileWithLogging)
+    path = tmp_path / "hello.txt"
+
+    class FullFile(io.TextIOWrapper):
+        def write(self, text):
+            if "boom" in text:
+                raise OSError("No space left on device")
+            return super().write(text)
+
+    file = BufferedFileWithLogging(FullFile(open(path, "wb")),
+                                   flush_interval=0.01, report_interval=0)
+    file.write("Hey\nAmitabh\n")
+    file.writelines(["a\nb", "", "c\n"])
+    assert file.stats.lines == 4
+    file.flush()
+    file.write("boom")
+    deadline = time.monotonic() + 5
+    while file.stats.pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+    with pytest.raises(OSError):
+        file.write("late")
+    file.write("!")
+    file.close()
+    assert path.read_text() == "Hey\nAmitabh\na\nbc\n!"
+
+
+def test_buffered_file_flushes_at_exit_without_close(tmp_path):
+    from _08_Decorator_Design_Pattern.dynamic_decorator import (
+        BufferedFileWithLogging)
+    path = tmp_path / "hello.txt"
+    file = BufferedFileWithLogging(open(path, "w"), report_interval=0)
+    file.write("Hey")
+    assert path.read_text() == ""
+    file._finalizer()
+    assert path.read_text() == "Hey"
+
+
+def test_background_file_group_commit(tmp_path):
+    from _08_Decorator_Design_Pattern.dynamic_decorator import (
+        BackgroundFileWithLogging)
+    path = tmp_path / "hello.txt"
+    file = BackgroundFileWithLogging(open(path, "w"), queue_size=4,
+                                     max_batch=3, fsync=True)
+    for i in range(10):
+        file.write(f"{i}")
+    file.writelines(["Hey", "Amitabh"])
+    file.flush()
+    assert path.read_text() == "0123456789HeyAmitabh"
+
+    stats = file.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["written"] == 11
+    assert stats["batches"] == stats["fsyncs"] >= 4
+    assert stats["max_latency_ms"] >= stats["mean_latency_ms"] > 0
+
+    file.write("!")
+    file.close()
+    assert path.read_text().endswith("Amitabh!")
+    with pytest.raises(ValueError):
+        file.write("late")
+
+
+def test_background_file_reports_writer_errors(tmp_path):
+    from _08_Decorator_Design_Pattern.dynamic_decorator import (
+        BackgroundFileWithLogging)
+    file = BackgroundFileWithLogging(open(tmp_path / "hello.txt", "w"))
+    file.write(b"not text")
+    with pytest.raises(TypeError):
+        file.flush()
+    file.close()
+
+
+def test_background_file_keeps_good_writes_of_a_failed_batch(tmp_path):
+    from _08_Decorator_Design_Pattern.dynamic_decorator import (
+        BackgroundFileWithLogging)
+    path = tmp_path / "hello.txt"
+    gate = threading.Event()
+
+    class GatedFile(io.TextIOWrapper):
+        def write(self, text):
+            gate.wait()
+            return super().write(text)
+
+    file = BackgroundFileWithLogging(GatedFile(open(path, "wb")))
+    file.write("Hey")
+    # The writer waits on the gate with "Hey", the next two form one batch.
+    file.write(b"not text")
+    file.write("Amitabh")
+    gate.set()
+    with pytest.raises(TypeError):
+        file.close()
+    assert path.read_text() == "HeyAmitabh"
+    assert file.stats()["written"] == 2 and file.stats()["failed"] == 1
+
+
+def test_background_file_drains_its_queue_at_exit_without_close(tmp_path):
+    path = tmp_path / "hello.txt"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = (
+        "import io, sys, threading\n"
+        f"sys.path.append({root!r})\n"
+        "from _08_Decorator_Design_Pattern.dynamic_decorator import "
+        "BackgroundFileWithLogging\n"
+        "gate = threading.Event()\n"
+        "class GatedFile(io.TextIOWrapper):\n"
+        "    def write(self, text):\n"
+        "        gate.wait()\n"
+        "        return super().write(text)\n"
+        f"file = BackgroundFileWithLogging(GatedFile(open({str(path)!r}, 'wb')))\n"
+        "for word in ('Hey', 'Amitabh', '!'):\n"
+        "    file.write(word)\n"
+        "threading.Timer(0.05, gate.set).start()\n"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True, timeout=30)
+    assert path.read_text() == "HeyAmitabh!"
+
+
+def test_background_file_writes_racing_close_are_kept_or_rejected(tmp_path):
+    from _08_Decorator_Design_Pattern.dynamic_decorator import (
+        BackgroundFileWithLogging)
+    path = tmp_path / "hello.txt"
+    file = BackgroundFileWithLogging(open(path, "w"), max_batch=4)
+    accepted = []
+
+    def writer(name):
+        for i in range(200):
+            try:
+                file.write(f"{name}{i}\n")
+            except ValueError:
+                return
+            accepted.append(f"{name}{i}")
+
+    threads = [threading.Thread(target=writer, args=(name,)) for name in "ab"]
+    for thread in threads:
+        thread.start()
+    file.close()
+    for thread in threads:
+        thread.join()
+    assert sorted(path.read_text().split()) == sorted(accepted)
+
+
+def test_mapped_file_lines_chunks_and_grep(tmp_path):
+    from _08_Decorator_Design_Pattern.dynamic_decorator import (
+        MappedFileWithLogging)
+    path = tmp_path / "scan.log"
+    path.write_bytes(b"INFO start\nERROR disk\nINFO ok\nERROR net ERROR\nlast")
+    file = MappedFileWithLogging(open(path, "rb"))
+
+    assert list(file) == [b"INFO start\n", b"ERROR disk\n", b"INFO ok\n",
+                          b"ERROR net ERROR\n", b"last"]
+    assert [bytes(line) for line in file.iter_lines(as_memoryview=True)] == \
+        list(file)
+    chunks = [bytes(chunk) for chunk in file.iter_chunks(size=12)]
+    assert b"".join(chunks) == path.read_bytes()
+    assert all(chunk.endswith(b"\n") for chunk in chunks[:-1])
+    assert list(file.find_all(b"ERROR")) == [11, 30, 40]
+    assert list(file.grep(b"ERROR")) == [b"ERROR disk\n", b"ERROR net ERROR\n"]
+    assert list(file.grep(b"last")) == [b"last"]
+    with pytest.raises(ValueError):
+        list(file.grep(b""))
+    file.close()
+
+    empty = tmp_path / "empty.log"
+    empty.write_bytes(b"")
+    file = MappedFileWithLogging(open(empty, "rb"))
+    assert list(file) == [] and list(file.iter_chunks()) == []
+    file.close()
+
+
+@pytest.mark.parametrize("codec", ["gzip", "bz2", "lzma"])
+def test_compressed_file_blocks_seek_and_parallel_read(tmp_path, codec):
+    from _08_Decorator_Design_Pattern.compressed_decorator import (
+        CompressedFileWithLogging)
+    path = tmp_path / f"log.{codec}"
+    content = b"".join(b"line %d\n" % i for i in range(100))
+    with open(path, "wb") as raw:
+        file = CompressedFileWithLogging(raw, codec=codec, block_size=64)
+        file.write(content[:300].decode())
+        file.writelines([content[300:]])
+        file.close()
+    assert file.stats()["raw_bytes"] == len(content)
+
+    with open(path, "rb") as raw:
+        file = CompressedFileWithLogging(raw)
+        assert len(file.blocks()) == -(-len(content) // 64)
+        assert file.size() == len(content)
+        assert file.read() == content
+        assert file.read() == b""
+        file.seek(100)
+        assert file.read(50) == content[100:150] and file.tell() == 150
+        file.seek(-10, 2)
+        assert file.read() == content[-10:]
+        assert file.read_block(1) == content[64:128]
+        assert list(file) == content.splitlines(keepends=True)
+        assert file.read_all(workers=4) == content
+
+
+def test_compressed_file_rejects_bad_input(tmp_path):
+    from _08_Decorator_Design_Pattern.compressed_decorator import (
+        CompressedFileWithLogging)
+    path = tmp_path / "bad.bin"
+    path.write_bytes(b"not a block header at all")
+    with open(path, "rb") as raw:
+        with pytest.raises(ValueError):
+            CompressedFileWithLogging(raw).read()
+        with pytest.raises(ValueError):
+            CompressedFileWithLogging(raw, codec="zip")
+
+    with open(path, "wb") as raw:
+        file = CompressedFileWithLogging(raw)
+        file.write("Hey Amitabh")
+        file.close()
+    whole = path.read_bytes()
+    for cut in (5, len(whole) - 3):
+        path.write_bytes(whole[:cut])
+        with open(path, "rb") as raw:
+            with pytest.raises(ValueError, match="Truncated"):
+                CompressedFileWithLogging(raw).read()
+
+
+def test_compressed_file_checks_raw_sizes_and_whence(tmp_path):
+    from _08_Decorator_Design_Pattern.compressed_decorator import (
+        BLOCK_HEADER, CompressedFileWithLogging)
+    path = tmp_path / "log.gz"
+    with open(path, "wb") as raw:
+        file = CompressedFileWithLogging(raw, block_size=8)
+        file.write("Hey Amitabh, hello")
+        file.close()
+    data = bytearray(path.read_bytes())
+    magic, codec_id, size, raw_size = BLOCK_HEADER.unpack_from(data)
+    BLOCK_HEADER.pack_into(data, 0, magic, codec_id, size, raw_size + 5)
+    path.write_bytes(data)
+    with open(path, "rb") as raw:
+        file = CompressedFileWithLogging(raw)
+        with pytest.raises(ValueError, match="Damaged"):
+            file.read()
+        with pytest.raises(ValueError, match="Damaged"):
+            file.read_all(workers=2)
+        with pytest.raises(ValueError):
+            file.seek(0, 3)
+
+
+def test_decorator_stack_resolves_and_rebuilds():
+    import io
+    from _08_Decorator_Design_Pattern.decorator_stack import (
+        DecoratorStack, Layer, LoggingLayer, MetricsLayer)
+
+    class Shout(Layer):
+        def write(self, text):
+            return self.inner.write(text.upper())
+
+    reports = []
+    logging, metrics = LoggingLayer(report=reports.append), MetricsLayer()
+    stack = DecoratorStack(io.StringIO(), [logging, metrics])
+    stack.write("Hey")
+    stack.writelines(["Amitabh"])
+    assert stack.getvalue() == "HeyAmitabh" and reports == ["Wrote 1 lines"]
+    assert (logging.lines, metrics.writes, metrics.chars) == (1, 1, 3)
+    assert "write" in stack.__dict__ and "getvalue" in stack.__dict__
+
+    shout = Shout()
+    stack.push(shout)
+    assert "write" not in stack.__dict__
+    stack.write("!x")
+    assert stack.getvalue() == "HeyAmitabh!X" and metrics.writes == 2
+
+    assert stack.pop() is shout
+    stack.remove(metrics)
+    stack.write("y")
+    assert stack.getvalue() == "HeyAmitabh!Xy" and metrics.writes == 2
+    assert stack.closed is False
@@ -0,0 +1,447 @@
+"""
+PyTest module to test Facade file
+"""
+
+import os, sys
+import threading
+import time
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from _09_Facade_Design_Pattern.facade import *
+from _09_Facade_Design_Pattern.servers import *
+
+
+def test_dependency_waves_order_and_errors():
+    servers = [ProcessServer('A', depends_on=('B', 'C')), FileServer('B'),
+               ProcessServer('C', depends_on=('B',)), FileServer('D')]
+    waves = [[server.name for server in wave] for wave in dependency_waves(servers)]
+    assert waves == [['B', 'D'], ['C'], ['A']]
+    reverse = [[server.name for server in wave]
+               for wave in dependency_waves(servers, reverse=True)]
+    assert reverse == [['A'], ['C'], ['B', 'D']]
+
+    with pytest.raises(ValueError):
+        dependency_waves([ProcessServer('A', depends_on=('missing',))])
+    with pytest.raises(ValueError):
+        dependency_waves([ProcessServer('A', depends_on=('B',)),
+                          ProcessServer('B', depends_on=('A',))])
+    with pytest.raises(ValueError):
+        dependency_waves([FileServer('A'), ProcessServer('A')])
+
+
+def test_operating_system_boots_waves_in_parallel(capsys):
+    extra = [ProcessServer(f'Worker{number}', depends_on=(), delay=0.05)
+             for number in range(6)]
+    system = OperatingSystem(FileServer(delay=0.05), ProcessServer(delay=0.05), extra)
+    report = system.start()
+    assert report.action == 'boot'
+    assert report.waves[0][0] == 'FileServer' and report.waves[1] == ['ProcessServer']
+    assert set(report.timings) == {server.name for server in system.servers}
+    assert all(timing >= 0.05 for timing in report.timings.values())
+    # 8 servers at 0.05s each would take 0.4s one after the other
+    assert report.wall < 0.3
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines.index('ProcessServer booted up!') > lines.index('FileServer booted up!')
+    system.shutdown()
+    lines = capsys.readouterr().out.splitlines()
+    assert lines.index('ProcessServer killed!') < lines.index('FileServer killed!')
+
+
+def test_operating_system_restart_kills_all_before_booting(capsys):
+    system = OperatingSystem()
+    system.start()
+    capsys.readouterr()
+    report = system.restart()
+    assert report.action == 'restart'
+    assert report.waves == [['ProcessServer'], ['FileServer'],
+                            ['FileServer'], ['ProcessServer']]
+    assert capsys.readouterr().out.splitlines() == [
+        'ProcessServer killed!', 'FileServer killed!',
+        'FileServer booted up!', 'ProcessServer booted up!']
+    assert system.fs.restarts == system.ps.restarts == 1
+    assert system.booted == {'FileServer', 'ProcessServer'}
+    system.shutdown()
+
+
+def test_operating_system_activates_servers_lazily(capsys):
+    system = OperatingSystem()
+    assert system.fs is None and system.ps is None and system.booted == set()
+
+    system.create_file("Amitabh", "a.txt", "r")
+    assert system.ps is None and system.booted == {'FileServer'}
+    system.create_process("Amitabh", "calm")
+    assert system.booted == {'FileServer', 'ProcessServer'}
+    system.create_process("Amitabh", "calm")
+    out = capsys.readouterr().out
+    assert out.count('booted up!') == 2
+    assert out.index('FileServer booted') < out.index('ProcessServer booted')
+
+    report = system.start()
+    assert report.waves == []
+    system.shutdown()
+    assert system.booted == set()
+
+
+def test_operating_system_stops_idle_servers():
+    system = OperatingSystem(idle_timeout=10)
+    system.create_process("Amitabh", "calm")
+    now = time.monotonic()
+    assert system.stop_idle(now) == []
+    # FileServer stays up while the ProcessServer depending on it runs
+    system.last_used['FileServer'] -= 20
+    assert system.stop_idle(now) == []
+    system.last_used['ProcessServer'] -= 20
+    assert system.stop_idle(now) == ['ProcessServer', 'FileServer']
+    assert system.booted == set()
+    system.create_file("Amitabh", "a.txt", "r")
+    assert system.booted == {'FileServer'}
+    system.shutdown()
+
+
+def test_operating_system_keeps_servers_in_use_running():
+    system = OperatingSystem(idle_timeout=10)
+    with system.using('fs'):
+        system.last_used['FileServer'] -= 20
+        assert system.in_flight == {'FileServer': 1}
+        assert system.stop_idle(time.monotonic()) == []
+        assert system.booted == {'FileServer'}
+    assert system.in_flight == {'FileServer': 0}
+    system.last_used['FileServer'] -= 20
+    assert system.stop_idle(time.monotonic()) == ['FileServer']
+    with pytest.raises(ValueError), system.using('fs'):
+        raise ValueError('failing call')
+    assert system.in_flight == {'FileServer': 0}
+    system.shutdown()
+
+
+def test_operating_system_idle_reaper_thread():
+    system = OperatingSystem(idle_timeout=0.05)
+    system.create_file("Amitabh", "a.txt", "r")
+    deadline = time.monotonic() + 2
+    while system.booted and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert system.booted == set() and system.ps is None
+    system.shutdown()
+
+
+def test_server_state_machine(capsys):
+    server = FileServer()
+    with pytest.raises(ValueError):
+        server.kill(restart=False)
+    server.boot()
+    assert server.state is State.running
+    with pytest.raises(ValueError):
+        server.boot()
+    server.kill(restart=True)
+    assert server.state is State.running and server.restarts == 1
+    server.kill(restart=False)
+    assert server.state is State.sleeping
+    assert [(old.name, new.name) for old, new, _ in server.history] == [
+        ('new', 'running'), ('running', 'restart'), ('restart', 'running'),
+        ('running', 'sleeping')]
+    assert server.latencies['running->restart'][0] == 1
+
+
+class StuckServer(ProcessServer):
+    """
+    A server which restarts are useless until it is fixed.
+    """
+    fixed = False
+
+    def healthy(self):
+        return self.fixed
+
+
+def test_health_monitor_restarts_zombies_with_backoff(capsys):
+    system = OperatingSystem(extra=[StuckServer('Stuck', depends_on=())], health_interval=60)
+    system.start()
+    monitor = system.monitor
+    monitor.jitter = 0
+    stuck = system.extra[0]
+    now = time.monotonic()
+
+    assert monitor.poll(now) == []
+    assert stuck.state is State.zombie and stuck.restarts == 1
+    assert monitor.failures == {'Stuck': 1} and monitor.retry_at['Stuck'] == now + 0.5
+    # no retry before the backoff is over, then it doubles
+    monitor.poll(now + 0.4)
+    assert stuck.restarts == 1
+    monitor.poll(now + 0.5)
+    assert stuck.restarts == 2 and monitor.retry_at['Stuck'] == now + 1.5
+
+    stuck.fixed = True
+    assert monitor.poll(now + 1.5) == ['Stuck']
+    assert stuck.state is State.running and monitor.failures == {}
+    system.fs.crash()
+    assert monitor.poll(now + 2) == ['FileServer']
+
+    metrics = system.metrics()
+    assert metrics['servers']['Stuck']['restarts'] == 3
+    assert metrics['servers']['FileServer']['transitions']['running->zombie']['count'] == 1
+    assert metrics['monitor']['zombies'] == 2
+    system.shutdown()
+    assert system.booted == set()
+
+
+class BrokenServer(ProcessServer):
+    """
+    A server which fails to start up again once broken.
+    """
+    broken = False
+
+    def start_up(self):
+        if self.broken:
+            raise RuntimeError('cannot start')
+
+
+def test_health_monitor_keeps_failed_restart_errors(capsys):
+    broken = BrokenServer('Broken', depends_on=())
+    system = OperatingSystem(extra=[broken], health_interval=60)
+    system.start()
+    monitor = system.monitor
+    monitor.jitter = 0
+    broken.broken = True
+    broken.crash()
+    now = time.monotonic()
+
+    assert monitor.poll(now) == []
+    assert broken.state is State.zombie and monitor.failures == {'Broken': 1}
+    assert isinstance(monitor.errors['Broken'], RuntimeError)
+    assert system.metrics()['monitor']['errors'] == {'Broken': "RuntimeError('cannot start')"}
+    broken.broken = False
+    assert monitor.poll(now + 1) == ['Broken']
+    assert monitor.errors == {} and broken.healthy()
+    system.shutdown()
+
+
+def test_health_monitor_leaves_busy_servers_alone(capsys):
+    system = OperatingSystem(health_interval=60)
+    system.create_file("Amitabh", "a.txt", "r")
+    system.fs.crash()
+    with system.using('fs'):
+        assert system.monitor.poll() == []
+        assert system.fs.state is State.zombie and system.fs.restarts == 0
+    assert system.monitor.poll() == ['FileServer']
+    assert system.fs.state is State.running and system.fs.restarts == 1
+    system.shutdown()
+
+
+def test_health_monitor_thread_polls():
+    system = OperatingSystem(health_interval=0.02)
+    system.create_file("Amitabh", "a.txt", "r")
+    system.fs.crash()
+    deadline = time.monotonic() + 2
+    # restarts goes up as the restart begins, wait for it to be over
+    while system.fs.history[-1][:2] != (State.restart, State.running) \
+            and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert system.fs.restarts == 1 and system.fs.healthy()
+    assert system.fs.state is State.running
+    system.shutdown()
+
+
+def test_batched_file_and_process_creation(capsys):
+    system = OperatingSystem()
+    result = system.create_files([("Amitabh", "a.txt", "r r-w"),
+                                  ("Amitabh", "b.txt", "rwz"),
+                                  ("Amitabh", "", "r"),
+                                  ("Bob", "c.txt", "rwx r-x r--")])
+    assert result.records == [FileRecord(1, "Amitabh", "a.txt", "r r-w"),
+                              FileRecord(2, "Bob", "c.txt", "rwx r-x r--")]
+    assert result.errors == [(1, "invalid permission 'rwz'"), (2, 'empty file name')]
+    assert system.create_files([]) == BatchResult([], [])
+    assert system.booted == {'FileServer'}
+
+    result = system.create_processes((("Amitabh", f"job{n}") for n in range(3)))
+    assert [record.pid for record in result.records] == [1000, 1001, 1002]
+    assert result.records[2].name == "job2" and result.errors == []
+    assert system.create_processes([("Amitabh", "")]).errors == [(0, 'empty process name')]
+    system.shutdown()
+
+
+def test_permission_mode():
+    assert permission_mode("r r-w") == 0o460
+    assert permission_mode("rwx r-x r--") == 0o754
+    assert permission_mode("-") == 0
+    with pytest.raises(ValueError):
+        permission_mode("rwz")
+
+
+def test_create_file_and_create_files_validate_alike(tmp_path):
+    for fs in (FileServer(), FileServer(root=str(tmp_path))):
+        for name, permission in (("a.txt", "rwz"), ("", "r"), ("a.txt", "r r r r")):
+            with pytest.raises(ValueError) as raised:
+                fs.create_file("Amitabh", name, permission)
+            assert fs.create_files([("Amitabh", name, permission)]).errors == [
+                (0, str(raised.value))]
+        assert fs.create_file("Amitabh", "a.txt", "rw r").startswith("Created file")
+        assert len(fs.create_files([("Amitabh", "a.txt", "rw r")]).records) == 1
+
+
+def test_lru_cache_evicts_least_recently_used():
+    evicted = []
+    cache = LRUCache(2, lambda key, value: evicted.append(key))
+    assert cache.get("a", str.upper) == "A"
+    cache.get("b", str.upper)
+    cache.get("a", str.upper)
+    cache.get("c", str.upper)
+    assert evicted == ["b"] and list(cache.items) == ["a", "c"]
+    assert (cache.hits, cache.misses) == (1, 3)
+    # replacing a value drops the old one too
+    cache.update([("d", 1), ("a", 2)])
+    assert evicted == ["b", "a", "c"] and list(cache.items) == ["d", "a"]
+    cache.clear()
+    assert len(cache) == 0 and evicted[-2:] == ["d", "a"]
+
+
+def test_file_server_on_disk(tmp_path, capsys):
+    system = OperatingSystem(FileServer(root=str(tmp_path), max_open=2))
+    fs = system.fs
+    system.create_file("Amitabh", "hello.txt", "rw r r")
+    path = tmp_path / "Amitabh" / "hello.txt"
+    assert path.exists() and path.stat().st_mode & 0o777 == 0o644
+    with pytest.raises(ValueError):
+        system.create_file("Amitabh", "../escape.txt", "rw")
+    with pytest.raises(ValueError):
+        system.create_file("Amitabh", "bad.txt", "rwz")
+
+    assert system.write_file("Amitabh", "hello.txt", "Hey") == 3
+    system.write_file("Amitabh", "hello.txt", b"Amitabh")
+    assert system.read_file("Amitabh", "hello.txt") == b"HeyAmitabh"
+    system.write_file("Amitabh", "hello.txt", "hey", offset=0)
+    assert system.read_file("Amitabh", "hello.txt", 5, offset=1) == b"eyAmi"
+    assert fs.stat_file("Amitabh", "hello.txt").st_size == 10
+    system.write_file("Amitabh", "hello.txt", "!")
+    assert fs.stat_file("Amitabh", "hello.txt").st_size == 11
+    # three descriptors were opened, only the last two stay open
+    assert len(fs.descriptors) == 2
+
+    result = system.create_files([("Amitabh", f"f{n}.txt", "r") for n in range(3)]
+                                 + [("Amitabh", "a/b", "r")])
+    assert len(result.records) == 3 and result.errors[0][0] == 3
+    assert [info.name for info in system.list_files("Amitabh")] == [
+        "f0.txt", "f1.txt", "f2.txt", "hello.txt"]
+    assert system.list_files("Amitabh")[0].mode == 0o400
+
+    system.delete_file("Amitabh", "hello.txt")
+    assert not path.exists() and len(fs.descriptors) == 0
+    with pytest.raises(FileNotFoundError):
+        fs.stat_file("Amitabh", "hello.txt")
+    system.shutdown()
+
+
+def test_file_server_reads_see_other_writers(tmp_path):
+    fs = FileServer(root=str(tmp_path))
+    fs.create_file("Amitabh", "shared.txt", "rw")
+    fs.write_file("Amitabh", "shared.txt", "Hey")
+    assert fs.read_file("Amitabh", "shared.txt") == b"Hey"
+    assert fs.stat_file("Amitabh", "shared.txt").st_size == 3
+    with open(tmp_path / "Amitabh" / "shared.txt", "ab") as file:
+        file.write(b"Amitabh")
+    assert fs.read_file("Amitabh", "shared.txt") == b"HeyAmitabh"
+
+
+def test_file_server_without_root_only_reports():
+    fs = FileServer()
+    assert fs.create_file("Amitabh", "a.txt", "r").startswith("Created file")
+    with pytest.raises(ValueError):
+        fs.read_file("Amitabh", "a.txt")
+
+
+def test_process_server_worker_pool(capsys):
+    system = OperatingSystem(ps=ProcessServer(pool_size=2, queue_size=4))
+    assert system.create_process("Amitabh", "calm") == 'Created process for user Amitabh (calm)'
+    result = system.create_process("Amitabh", "fact", "math:factorial", (5,))
+    assert result.value == 120 and result.name == "fact" and result.pid == 1000
+
+    futures = [system.ps.submit("Amitabh", f"job{n}", "os:getpid") for n in range(20)]
+    results = [future.result() for future in futures]
+    # workers are reused: only the 2 pre-started processes answer
+    assert {result.worker for result in results} == {result.value for result in results}
+    assert len({result.worker for result in results}) <= 2
+
+    with pytest.raises(RuntimeError, match="ValueError"):
+        system.create_process("Amitabh", "bad", "math:sqrt", (-1,))
+    before = {worker.pid for worker in system.ps.pool.workers}
+    with pytest.raises(TimeoutError):
+        system.create_process("Amitabh", "slow", "time:sleep", (5,), timeout=0.1)
+    pool = system.ps.pool
+    assert pool.counts['timeouts'] == 1 and pool.counts['respawns'] == 1
+    assert {worker.pid for worker in pool.workers} != before
+    assert system.create_process("Amitabh", "again", "math:factorial", (3,)).value == 6
+
+    system.shutdown()
+    assert system.ps.pool is None and all(worker.poll() is not None for worker in pool.workers)
+    with pytest.raises(RuntimeError):
+        system.ps.submit("Amitabh", "late", "os:getpid")
+
+
+def test_worker_pool_survives_prints_and_bad_arguments():
+    pool = WorkerPool(1)
+    # the task's print goes to stderr, not into the reply channel
+    assert pool.submit('builtins:print', ('hi',), timeout=5).result()[1] is None
+    with pytest.raises(TypeError):
+        pool.submit('builtins:len', (object(),))
+    assert pool.submit('builtins:len', ('abc',), timeout=5).result()[1] == 3
+    assert pool.counts == {'completed': 2, 'failed': 0, 'timeouts': 0, 'respawns': 0}
+    pool.close()
+
+
+def test_worker_pool_close_does_not_wait_forever():
+    pool = WorkerPool(1, queue_size=2)
+    running = pool.submit('time:sleep', (30,))
+    waiting = pool.submit('os:getpid')
+    start = time.monotonic()
+    pool.close(timeout=0.2)
+    assert time.monotonic() - start < 5
+    with pytest.raises(RuntimeError):
+        running.result(timeout=1)
+    with pytest.raises(RuntimeError):
+        waiting.result(timeout=1)
+    assert all(worker.poll() is not None for worker in pool.workers)
+    with pytest.raises(RuntimeError):
+        pool.submit('os:getpid')
+
+
+def test_worker_pool_submits_racing_close_always_resolve():
+    pool = WorkerPool(2, queue_size=8)
+    accepted = []
+
+    def submitter():
+        while True:
+            try:
+                accepted.append(pool.submit('os:getpid'))
+            except RuntimeError:
+                return
+
+    threads = [threading.Thread(target=submitter) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    pool.close()
+    for thread in threads:
+        thread.join()
+    assert accepted
+    for future in accepted:
+        future.exception(timeout=5)
+
+
+def test_worker_pool_and_process_server_handle_cancelled_tasks(monkeypatch):
+    errors = []
+    monkeypatch.setattr(threading, "excepthook", errors.append)
+    pool = WorkerPool(1, queue_size=4)
+    pool.submit('time:sleep', (30,))
+    waiting = pool.submit('os:getpid')
+    assert waiting.cancel()
+    pool.close(timeout=0.2)
+
+    server = ProcessServer(pool_size=1)
+    server.boot()
+    server.submit("Amitabh", "slow", "time:sleep", (0.3,))
+    cancelled = server.submit("Amitabh", "late", "os:getpid")
+    assert cancelled.cancel()
+    last = server.submit("Amitabh", "last", "math:factorial", (3,))
+    assert last.result(timeout=5).value == 6 and cancelled.cancelled()
+    server.kill(restart=False)
+    assert errors == []
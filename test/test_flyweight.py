@@ -0,0 +1,63 @@
+"""
+PyTest module to test Flyweight file
+"""
+
+import os, sys
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from _10_Flyweight_Design_Pattern.flyweight_text_formatting import *
+
+
+def test_formatted_text():
+    text = FormattedText("Hello, World!")
+    text.capitalize(7, 12)
+    assert str(text) == "Hello, WORLD!"
+
+
+def test_styles_are_interned():
+    assert len(STYLES) == 8
+    assert all(style.style_id == style_id for style_id, style in enumerate(STYLES))
+    assert STYLES[CAPITALIZE | BOLD] == TextStyle(capitalize=True, bold=True)
+
+
+def test_text_ranges_are_views_on_arrays():
+    text = BetterFormattedText("Hello, World!")
+    range_ = text.format_text(7, 12)
+    assert str(text) == "Hello, World!"
+    range_.capitalize = True
+    range_.bold = True
+    assert str(text) == "Hello, WORLD!"
+    assert list(text.style_ids) == [CAPITALIZE | BOLD]
+    assert text[0].style is STYLES[CAPITALIZE | BOLD] and text[-1].italic is False
+    range_.capitalize = False
+    assert text[0].style is STYLES[BOLD] and str(text) == "Hello, World!"
+    assert range_.covers(12) and not range_.covers(6)
+    with pytest.raises(IndexError):
+        text[1]
+
+
+def test_overlapping_ranges_and_bulk_add():
+    text = BetterFormattedText("abcdefghij")
+    text.format_text(0, 2, STYLES[CAPITALIZE])
+    text.add_ranges([1, 5, 8], [4, 6, 20], [CAPITALIZE, ITALIC, CAPITALIZE])
+    assert len(text) == 4
+    assert str(text) == "ABCDEfghIJ"
+    with pytest.raises(ValueError):
+        text.add_ranges([1], [2, 3], [0])
+
+
+def test_ranges_are_validated():
+    text = BetterFormattedText("abcdefghij")
+    for starts, ends, style_ids in (([-1], [2], [0]), ([1], [2], [8]),
+                                    ([1, 2], [2, 3], [0, -1])):
+        with pytest.raises(ValueError):
+            text.add_ranges(starts, ends, style_ids)
+    assert len(text) == len(text.ends) == len(text.style_ids) == 0
+    with pytest.raises(ValueError):
+        text.format_text(-1, 2)
+    range_ = text.format_text(0, 2)
+    with pytest.raises(ValueError):
+        range_.style_id = len(STYLES)
+    with pytest.raises(ValueError):
+        range_.style_id = -1
+    assert range_.style is STYLES[0]